@@ -6,7 +6,8 @@ mkinit ~/code/kwimage/kwimage/__init__.py --relative --nomod  -w
 
 __version__ = '0.6.10'
 
-from .algo import (available_nms_impls, daq_spatial_nms, non_max_supression,)
+from .algo import (available_nms_impls, daq_spatial_nms, grid_spatial_nms,
+                   non_max_supression,)
 from .im_alphablend import (ensure_alpha_channel, overlay_alpha_images,
                             overlay_alpha_layers,)
 from .im_color import (BASE_COLORS, CSS4_COLORS, Color, TABLEAU_COLORS,
@@ -43,7 +44,8 @@ __all__ = ['BASE_COLORS', 'Boxes', 'CSS4_COLORS', 'Color', 'Coords',
            'draw_vector_field', 'encode_run_length', 'ensure_alpha_channel',
            'ensure_float01', 'ensure_uint255', 'fourier_mask',
            'gaussian_patch', 'grab_test_image', 'grab_test_image_fpath',
-           'imread', 'imresize', 'imscale', 'imwrite', 'load_image_shape',
+           'grid_spatial_nms', 'imread', 'imresize', 'imscale', 'imwrite',
+           'load_image_shape',
            'make_channels_comparable', 'make_heatmask', 'make_orimask',
            'make_vector_field', 'non_max_supression', 'normalize',
            'num_channels', 'overlay_alpha_images', 'overlay_alpha_layers',
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the optional numba backends
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+import ubelt as ub
+
+
+@ub.memoize
+def _numba_is_available():
+    """
+    Checks if numba is installed without importing it. Backends should import
+    numba lazily on first use.
+    """
+    import importlib.util
+    return importlib.util.find_spec('numba') is not None
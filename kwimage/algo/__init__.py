@@ -2,6 +2,7 @@
 mkinit ~/code/kwimage/kwimage/algo/__init__.py -w --relative
 """
 from .algo_nms import (available_nms_impls, daq_spatial_nms,
-                       non_max_supression,)
+                       grid_spatial_nms, non_max_supression,)
 
-__all__ = ['available_nms_impls', 'daq_spatial_nms', 'non_max_supression']
+__all__ = ['available_nms_impls', 'daq_spatial_nms', 'grid_spatial_nms',
+           'non_max_supression']
@@ -0,0 +1,108 @@
+/**************************************************************************
+* Alpha compositing kernels used by kwimage.overlay_alpha_images
+*
+* The AVX2 kernel is compiled with a function level target attribute and is
+* only dispatched to at runtime if the CPU supports it, so the extension can
+* be built without -mavx2 and still run on older machines.
+**************************************************************************/
+#include "blend_avx2.h"
+
+#if defined(__GNUC__) && (defined(__x86_64__) || defined(__i386__))
+#define KWIMAGE_HAVE_AVX2_TARGET 1
+#include <immintrin.h>
+#endif
+
+
+/* Blends pixels in the range [start, stop) one at a time */
+static void blend_scalar( const float *rgb1, const float *a1,
+                          const float *rgb2, const float *a2,
+                          float *out_rgb, float *out_a,
+                          size_t start, size_t stop )
+{
+    size_t i, k;
+    for( i = start; i < stop; i++ ) {
+        float alpha1 = a1[i];
+        float alpha2 = a2[i] * (1.0f - alpha1);
+        float alpha3 = alpha1 + alpha2;
+        float w1 = 0.0f, w2 = 0.0f;
+        out_a[i] = alpha3;
+        if( alpha3 != 0.0f ) {
+            w1 = alpha1 / alpha3;
+            w2 = alpha2 / alpha3;
+        }
+        for( k = 0; k < 3; k++ ) {
+            out_rgb[3 * i + k] = rgb1[3 * i + k] * w1 + rgb2[3 * i + k] * w2;
+        }
+    }
+}
+
+
+#ifdef KWIMAGE_HAVE_AVX2_TARGET
+/* Blends 8 pixels at a time and returns the number of pixels processed.
+ *
+ * The per-pixel weights are computed once for 8 pixels and then permuted so
+ * they line up with the 24 interleaved rgb values of those pixels. */
+__attribute__((target("avx2,fma")))
+static size_t blend_avx2( const float *rgb1, const float *a1,
+                          const float *rgb2, const float *a2,
+                          float *out_rgb, float *out_a, size_t npix )
+{
+    const __m256 ones = _mm256_set1_ps(1.0f);
+    const __m256 zeros = _mm256_setzero_ps();
+    const __m256i lane0 = _mm256_setr_epi32(0, 0, 0, 1, 1, 1, 2, 2);
+    const __m256i lane1 = _mm256_setr_epi32(2, 3, 3, 3, 4, 4, 4, 5);
+    const __m256i lane2 = _mm256_setr_epi32(5, 5, 6, 6, 6, 7, 7, 7);
+    size_t i;
+    for( i = 0; i + 8 <= npix; i += 8 ) {
+        const float *p1 = rgb1 + 3 * i;
+        const float *p2 = rgb2 + 3 * i;
+        float *p3 = out_rgb + 3 * i;
+        __m256 alpha1 = _mm256_loadu_ps(a1 + i);
+        __m256 alpha2 = _mm256_mul_ps(_mm256_loadu_ps(a2 + i),
+                                      _mm256_sub_ps(ones, alpha1));
+        __m256 alpha3 = _mm256_add_ps(alpha1, alpha2);
+        /* zero the weights of fully transparent pixels */
+        __m256 nonzero = _mm256_cmp_ps(alpha3, zeros, _CMP_NEQ_OQ);
+        __m256 inv = _mm256_and_ps(_mm256_div_ps(ones, alpha3), nonzero);
+        __m256 w1 = _mm256_mul_ps(alpha1, inv);
+        __m256 w2 = _mm256_mul_ps(alpha2, inv);
+        _mm256_storeu_ps(out_a + i, alpha3);
+
+        _mm256_storeu_ps(p3, _mm256_fmadd_ps(
+            _mm256_loadu_ps(p2), _mm256_permutevar8x32_ps(w2, lane0),
+            _mm256_mul_ps(_mm256_loadu_ps(p1), _mm256_permutevar8x32_ps(w1, lane0))));
+        _mm256_storeu_ps(p3 + 8, _mm256_fmadd_ps(
+            _mm256_loadu_ps(p2 + 8), _mm256_permutevar8x32_ps(w2, lane1),
+            _mm256_mul_ps(_mm256_loadu_ps(p1 + 8), _mm256_permutevar8x32_ps(w1, lane1))));
+        _mm256_storeu_ps(p3 + 16, _mm256_fmadd_ps(
+            _mm256_loadu_ps(p2 + 16), _mm256_permutevar8x32_ps(w2, lane2),
+            _mm256_mul_ps(_mm256_loadu_ps(p1 + 16), _mm256_permutevar8x32_ps(w1, lane2))));
+    }
+    return i;
+}
+#endif
+
+
+int kwimage_alpha_blend_has_avx2( void )
+{
+#ifdef KWIMAGE_HAVE_AVX2_TARGET
+    __builtin_cpu_init();
+    return __builtin_cpu_supports("avx2") && __builtin_cpu_supports("fma");
+#else
+    return 0;
+#endif
+}
+
+
+void kwimage_alpha_blend( const float *rgb1, const float *a1,
+                          const float *rgb2, const float *a2,
+                          float *out_rgb, float *out_a, size_t npix )
+{
+    size_t done = 0;
+#ifdef KWIMAGE_HAVE_AVX2_TARGET
+    if( kwimage_alpha_blend_has_avx2() ) {
+        done = blend_avx2(rgb1, a1, rgb2, a2, out_rgb, out_a, npix);
+    }
+#endif
+    blend_scalar(rgb1, a1, rgb2, a2, out_rgb, out_a, done, npix);
+}
@@ -0,0 +1,17 @@
+/**************************************************************************
+* Alpha compositing kernels used by kwimage.overlay_alpha_images
+**************************************************************************/
+#pragma once
+
+#include <stddef.h>
+
+/* Places rgb1/a1 on top of rgb2/a2 and writes the result to out_rgb/out_a.
+ * The rgb arrays are contiguous interleaved (npix, 3) float32 buffers and the
+ * alpha arrays are contiguous (npix,) float32 buffers. Uses AVX2 / FMA
+ * instructions when the running CPU supports them. */
+void kwimage_alpha_blend( const float *rgb1, const float *a1,
+                          const float *rgb2, const float *a2,
+                          float *out_rgb, float *out_a, size_t npix );
+
+/* Returns 1 if kwimage_alpha_blend will use the AVX2 code path. */
+int kwimage_alpha_blend_has_avx2( void );
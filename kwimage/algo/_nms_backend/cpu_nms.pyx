@@ -70,6 +70,22 @@ def cpu_nms(np.ndarray[np.float32_t, ndim=2] tlbr,
         >>> thresh = .5
         >>> bias = 0.0
         >>> cpu_nms(tlbr, scores, thresh, bias)
+
+    Example:
+        >>> # Results agree with py_nms, including for zero-area boxes
+        >>> from kwimage.algo._nms_backend.cpu_nms import cpu_nms
+        >>> from kwimage.algo._nms_backend.py_nms import py_nms
+        >>> import kwimage
+        >>> rng = np.random.RandomState(0)
+        >>> tlbr = kwimage.Boxes.random(100, rng=rng).scale(100).to_tlbr().data
+        >>> tlbr = tlbr.astype(np.float32)
+        >>> tlbr[0:20, 2:4] = tlbr[0:20, 0:2]
+        >>> scores = rng.rand(len(tlbr)).astype(np.float32)
+        >>> for thresh in [0.0, 0.2, 0.5, 1.0]:
+        >>>     for bias in [0.0, 1.0]:
+        >>>         keep1 = cpu_nms(tlbr, scores, thresh, bias)
+        >>>         keep2 = py_nms(tlbr, scores, thresh, bias)
+        >>>         assert keep1 == [int(i) for i in keep2]
     """
     cdef int n_boxes = tlbr.shape[0]
 
@@ -81,7 +97,7 @@ def cpu_nms(np.ndarray[np.float32_t, ndim=2] tlbr,
     cdef np.ndarray[np.float32_t, ndim=1] areas = (x2 - x1 + bias) * (y2 - y1 + bias)
     cdef np.ndarray[SIZE_T, ndim=1] order = scores.argsort()[::-1].astype(SIZE_T_DTYPE)
 
-    cdef np.ndarray[np.int32_t, ndim=1] suppressed = np.zeros(n_boxes, dtype=np.int32)
+    cdef np.ndarray[np.uint8_t, ndim=1] suppressed = np.zeros(n_boxes, dtype=np.uint8)
 
     # nominal indices
     cdef SIZE_T _i, _j
@@ -105,7 +121,7 @@ def cpu_nms(np.ndarray[np.float32_t, ndim=2] tlbr,
     cdef float[:] y2_view = y2
     cdef float[:] areas_view = areas
     cdef SIZE_T[:] order_view = order
-    cdef int[:] suppressed_view = suppressed
+    cdef np.uint8_t[:] suppressed_view = suppressed
 
     cdef float _thresh = thresh
     cdef float _bias = bias
@@ -140,12 +156,18 @@ def cpu_nms(np.ndarray[np.float32_t, ndim=2] tlbr,
                 for _j in range(_i + 1, n_boxes):
                     j = order_view[_j]
                     if suppressed_view[j] == 0:
+                        # Boxes that do not intersect have zero overlap and
+                        # can never be supressed, so exit early for them.
                         xx1 = max_(ix1, x1_view[j])
-                        yy1 = max_(iy1, y1_view[j])
                         xx2 = min_(ix2, x2_view[j])
+                        w = xx2 - xx1 + _bias
+                        if w <= 0:
+                            continue
+                        yy1 = max_(iy1, y1_view[j])
                         yy2 = min_(iy2, y2_view[j])
-                        w = max_(0.0, xx2 - xx1 + _bias)
-                        h = max_(0.0, yy2 - yy1 + _bias)
+                        h = yy2 - yy1 + _bias
+                        if h <= 0:
+                            continue
                         # Supress any other detection that overlaps with the i-th
                         # detection, which we just kept.
                         inter = w * h
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Greedy NMS using OpenCV's ``cv2.dnn.NMSBoxes``.
+
+OpenCV has no bias term and considers zero-area boxes to overlap each other,
+so those inputs are handled by :func:`py_nms` instead.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+import numpy as np
+import ubelt as ub
+from kwimage.algo._nms_backend.py_nms import py_nms
+
+
+@ub.memoize
+def _lookup_cv2_nms():
+    try:
+        import cv2
+        _cv2_nms = cv2.dnn.NMSBoxes
+    except (ImportError, AttributeError):
+        return None
+    else:
+        return _cv2_nms
+
+
+def _cv2_nms_is_available():
+    return _lookup_cv2_nms() is not None
+
+
+def cv2_nms(np_tlbr, np_scores, thresh, bias=0.0):
+    """
+    Args:
+        np_tlbr (ndarray): Nx4 boxes in tlbr format
+        np_scores (ndarray): N scores
+        thresh (float): boxes with an IoU larger than this are suppressed
+        bias (float): bias for computing box width and height
+
+    Returns:
+        List[int]: indices of the kept boxes, in order of decreasing score
+
+    Example:
+        >>> # xdoctest: +REQUIRES(module:cv2)
+        >>> from kwimage.algo._nms_backend.cv2_nms import *  # NOQA
+        >>> import kwimage
+        >>> rng = np.random.RandomState(0)
+        >>> np_tlbr = kwimage.Boxes.random(200, rng=rng).scale(100).to_tlbr().data
+        >>> np_scores = rng.rand(len(np_tlbr))
+        >>> for thresh in [0.0, 0.2, 0.5, 1.0]:
+        >>>     for bias in [0, 1]:
+        >>>         keep1 = cv2_nms(np_tlbr, np_scores, thresh, bias=bias)
+        >>>         keep2 = py_nms(np_tlbr, np_scores, thresh, bias=bias)
+        >>>         assert keep1 == [int(i) for i in keep2]
+    """
+    _cv2_nms = _lookup_cv2_nms()
+    wh = np_tlbr[:, 2:4] - np_tlbr[:, 0:2]
+    if _cv2_nms is None or bias != 0 or not np.all(wh > 0):
+        keep = py_nms(np_tlbr, np_scores, thresh, bias=bias)
+        return [int(i) for i in keep]
+    # OpenCV may order ties differently, so give it positive ranks that
+    # encode our ordering instead of the raw scores.
+    num = len(np_tlbr)
+    order = np_scores.argsort()[::-1]
+    ranks = np.empty(num, dtype=np.float32)
+    ranks[order] = np.arange(num, 0, -1)
+    xywh = np.hstack([np_tlbr[:, 0:2], wh]).astype(np.float64)
+    keep = _cv2_nms(xywh, ranks, 0.0, float(thresh))
+    return np.asarray(keep, dtype=np.int64).ravel().tolist()
+
+
+if __name__ == '__main__':
+    """
+    CommandLine:
+        xdoctest -m kwimage.algo._nms_backend.cv2_nms
+    """
+    import xdoctest
+    xdoctest.doctest_module(__file__)
@@ -7,7 +7,14 @@ Written by Ross Girshick
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 import numpy as np
-import warnings
+
+# Inputs with at most this many boxes are handled by computing the full
+# (N, N) overlap matrix up front instead of looping over the boxes.
+MATRIX_MAX_BOXES = 2048
+
+# The overlap matrix is computed this many rows at a time, which bounds the
+# size of the float temporaries.
+MATRIX_BLOCK_ROWS = 256
 
 
 def py_nms(np_tlbr, np_scores, thresh, bias=1):
@@ -57,45 +64,123 @@ def py_nms(np_tlbr, np_scores, thresh, bias=1):
         keep@0.5 = [2, 1, 3]
         keep@1.0 = [2, 1, 3, 0]
     """
-    x1 = np_tlbr[:, 0]
-    y1 = np_tlbr[:, 1]
-    x2 = np_tlbr[:, 2]
-    y2 = np_tlbr[:, 3]
+    if np_tlbr.dtype.kind != 'f':
+        np_tlbr = np_tlbr.astype(np.float64)
+
+    # Sort the boxes by score once, everything below works in sorted order
+    order = np_scores.argsort()[::-1]
+    x1 = np_tlbr[order, 0]
+    y1 = np_tlbr[order, 1]
+    x2 = np_tlbr[order, 2]
+    y2 = np_tlbr[order, 3]
 
     areas = (x2 - x1 + bias) * (y2 - y1 + bias)
 
-    idxs_remain = np_scores.argsort()[::-1]
+    n_boxes = len(order)
+    if n_boxes <= MATRIX_MAX_BOXES:
+        return _matrix_nms(x1, y1, x2, y2, areas, order, thresh, bias)
 
     keep = []
 
-    with warnings.catch_warnings():
-        warnings.filterwarnings('ignore', 'invalid value .* true_divide')
-        # n_conflicts = 0
-        while idxs_remain.size > 0:
-            i = idxs_remain[0]
-            keep.append(i)
-            # print('Keeping the i={}-th box'.format(i))
-
-            idxs_remain = idxs_remain[1:]
-            # print('Compute IoU between chosen and remaining boxes')
-            xx1 = np.maximum(x1[i], x1[idxs_remain])
-            yy1 = np.maximum(y1[i], y1[idxs_remain])
-            xx2 = np.minimum(x2[i], x2[idxs_remain])
-            yy2 = np.minimum(y2[i], y2[idxs_remain])
-
-            w = np.maximum(0.0, xx2 - xx1 + bias)
-            h = np.maximum(0.0, yy2 - yy1 + bias)
-            inter = w * h
-            iou = inter / (areas[i] + areas[idxs_remain] - inter)
-            iou = np.nan_to_num(iou)
-            # print('Checking overlap between the i={}-th and remaining boxes'.format(i))
-
-            # Keep anything that doesnt have a large overlap with this item
-            flags = iou <= thresh
-            inds = np.where(flags)[0]
-            # print('Supress {} boxes that did overlap this one'.format(len(ovr) - len(inds)))
-            # print('Consider {} boxes that dont overlap this one'.format(len(inds)))
-            idxs_remain = idxs_remain[inds]
+    # Instead of shrinking an index array, mark suppressed boxes as dead and
+    # advance a pointer over the sorted boxes.
+    alive = np.ones(n_boxes, dtype=bool)
+    ptr = 0
+    while ptr < n_boxes:
+        if not alive[ptr]:
+            ptr += 1
+            continue
+        i = ptr
+        keep.append(order[i])
+        ptr += 1
+
+        rest = np.flatnonzero(alive[ptr:])
+        if rest.size == 0:
+            break
+        rest += ptr
+
+        # Lookup the chosen box once and gather the remaining boxes
+        ix1, iy1, ix2, iy2, iarea = x1[i], y1[i], x2[i], y2[i], areas[i]
+        xx1 = np.maximum(ix1, x1[rest])
+        yy1 = np.maximum(iy1, y1[rest])
+        xx2 = np.minimum(ix2, x2[rest])
+        yy2 = np.minimum(iy2, y2[rest])
+        jareas = areas[rest]
+
+        # The width and height overwrite the right / bottom coordinates
+        w = np.subtract(xx2, xx1, out=xx2)
+        w += bias
+        np.maximum(0.0, w, out=w)
+        h = np.subtract(yy2, yy1, out=yy2)
+        h += bias
+        np.maximum(0.0, h, out=h)
+        inter = np.multiply(w, h, out=w)
+
+        # The union overwrites the gathered areas. It is only zero when
+        # both boxes have no area, in which case the iou is left as zero.
+        union = jareas
+        union += iarea
+        union -= inter
+        iou = np.divide(inter, union, out=inter, where=union != 0)
+
+        # Suppress anything that has a large overlap with this item
+        alive[rest[iou > thresh]] = False
+    return keep
+
+
+def _matrix_nms(x1, y1, x2, y2, areas, order, thresh, bias):
+    """
+    Greedy NMS over a precomputed all-pairs overlap matrix. The box
+    coordinates and areas must already be sorted by decreasing score according
+    to order. Only the boolean overlap matrix is kept at full size.
+
+    Uses the same arithmetic as the loop in :func:`py_nms`, so the results
+    are identical, but the only per-box python work is one row lookup for
+    each kept box.
+
+    Example:
+        >>> import kwimage
+        >>> rng = np.random.RandomState(0)
+        >>> np_tlbr = kwimage.Boxes.random(300, rng=rng).scale(100).to_tlbr().data
+        >>> np_scores = rng.rand(len(np_tlbr))
+        >>> from kwimage.algo._nms_backend import py_nms as py_nms_mod
+        >>> orig = py_nms_mod.MATRIX_MAX_BOXES
+        >>> for thresh in [0.0, 0.1, 0.5, 1.0]:
+        >>>     keep1 = py_nms(np_tlbr, np_scores, thresh, bias=0)
+        >>>     py_nms_mod.MATRIX_MAX_BOXES = 0
+        >>>     keep2 = py_nms(np_tlbr, np_scores, thresh, bias=0)
+        >>>     py_nms_mod.MATRIX_MAX_BOXES = orig
+        >>>     assert list(keep1) == list(keep2)
+    """
+    n_boxes = len(order)
+    overlaps = np.empty((n_boxes, n_boxes), dtype=bool)
+    for start in range(0, n_boxes, MATRIX_BLOCK_ROWS):
+        sl = slice(start, start + MATRIX_BLOCK_ROWS)
+        xx1 = np.maximum(x1[sl, None], x1[None, :])
+        yy1 = np.maximum(y1[sl, None], y1[None, :])
+        xx2 = np.minimum(x2[sl, None], x2[None, :])
+        yy2 = np.minimum(y2[sl, None], y2[None, :])
+
+        w = np.subtract(xx2, xx1, out=xx2)
+        w += bias
+        np.maximum(0.0, w, out=w)
+        h = np.subtract(yy2, yy1, out=yy2)
+        h += bias
+        np.maximum(0.0, h, out=h)
+        inter = np.multiply(w, h, out=w)
+
+        union = np.add(areas[sl, None], areas[None, :], out=xx1)
+        union -= inter
+        iou = np.divide(inter, union, out=inter, where=union != 0)
+        np.greater(iou, thresh, out=overlaps[sl])
+
+    keep = []
+    suppressed = np.zeros(n_boxes, dtype=bool)
+    for k in range(n_boxes):
+        if suppressed[k]:
+            continue
+        keep.append(order[k])
+        suppressed |= overlaps[k]
     return keep
 
 
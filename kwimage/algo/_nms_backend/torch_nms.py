@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 import numpy as np
-from distutils.version import LooseVersion
 
 
 try:
@@ -10,6 +9,7 @@ except Exception:
     torch = None
     _TORCH_HAS_BOOL_COMP = False
 else:
+    from distutils.version import LooseVersion
     _TORCH_HAS_BOOL_COMP = LooseVersion(torch.__version__) >= LooseVersion('1.2.0')
 
 
@@ -187,6 +187,121 @@ def daq_spatial_nms(tlbr, scores, diameter, thresh, max_depth=6,
     return keep
 
 
+def grid_spatial_nms(tlbr, scores, thresh, diameter=None, cell_size=None,
+                     bucket_size=512, classes=None, impl='auto',
+                     device_id=None, workers=0):
+    """
+    Bucketed non-max-supression for large sets of spatially dispersed boxes.
+
+    Boxes are hashed into a uniform grid by their centers and standard NMS is
+    run independently in each cell. Any two overlapping boxes in different
+    cells must both have centers within ``diameter`` of a cell edge, so only
+    the surviving boxes near cell edges are rechecked in a final pass.
+
+    Like :func:`daq_spatial_nms`, results may differ slightly from the exact
+    greedy solution because suppression does not chain across cell borders.
+
+    Args:
+        tlbr (ndarray): boxes in (tlx, tly, brx, bry) format
+
+        scores (ndarray): scores of each box
+
+        thresh (float): iou threshold. Boxes are removed if they overlap
+            greater than this threshold.
+
+        diameter (float, default=None): maximum width or height of any box.
+            Computed from the boxes if unspecified.
+
+        cell_size (float, default=None): side length of a grid cell. If
+            unspecified it is chosen so that each occupied cell holds roughly
+            ``bucket_size`` boxes, but is never less than ``8 * diameter``.
+
+        bucket_size (int): target number of boxes per cell when
+            ``cell_size`` is not given.
+
+        classes (ndarray, default=None): if specified, nms is only done
+            between boxes of the same class.
+
+        impl (str): nms implementation used within each cell
+
+        workers (int, default=0): if positive, the cells are solved in a
+            thread pool with this many workers. This only helps for impls
+            that release the GIL (e.g. cython_cpu).
+
+    Returns:
+        List[int]: sorted indices of the boxes to keep
+
+    Example:
+        >>> import kwimage
+        >>> rng = np.random.RandomState(0)
+        >>> boxes = kwimage.Boxes.random(2000, scale=1000, format='cxywh', rng=rng)
+        >>> boxes.data.T[2] = 10
+        >>> boxes.data.T[3] = 10
+        >>> tlbr = boxes.to_tlbr().data.astype(np.float32)
+        >>> scores = rng.rand(len(tlbr)).astype(np.float32)
+        >>> keep1 = grid_spatial_nms(tlbr, scores, thresh=0.1, cell_size=100)
+        >>> keep2 = sorted(non_max_supression(tlbr, scores, thresh=0.1))
+        >>> similarity = len(set(keep1) & set(keep2)) / len(set(keep1) | set(keep2))
+        >>> print('similarity = {!r}'.format(similarity))
+        >>> assert similarity > 0.95
+        >>> keep3 = grid_spatial_nms(tlbr, scores, thresh=0.1, cell_size=100,
+        >>>                          workers=2)
+        >>> assert keep3 == keep1
+    """
+    tlbr = kwarray.ArrayAPI.numpy(tlbr)
+    scores = kwarray.ArrayAPI.numpy(scores)
+    if classes is not None:
+        classes = kwarray.ArrayAPI.numpy(classes)
+
+    num = len(tlbr)
+    if num == 0:
+        return []
+
+    def _nms(idxs):
+        cls = None if classes is None else classes[idxs]
+        keep = non_max_supression(tlbr[idxs], scores[idxs], thresh=thresh,
+                                  classes=cls, impl=impl, device_id=device_id)
+        return idxs[np.asarray(keep, dtype=np.int64)]
+
+    if diameter is None:
+        wh = tlbr[:, 2:4] - tlbr[:, 0:2]
+        diameter = float(wh.max())
+    diameter = max(float(diameter), 1e-8)
+
+    center = (tlbr[:, 0:2] + tlbr[:, 2:4]) * 0.5
+    if cell_size is None:
+        extent = center.max(axis=0) - center.min(axis=0)
+        area = max(float(extent[0]) * float(extent[1]), 1.0)
+        cell_size = max(np.sqrt(area * bucket_size / num), 8 * diameter)
+
+    cell_xy = np.floor(center / cell_size).astype(np.int64)
+    _, bucket_idx = np.unique(cell_xy, axis=0, return_inverse=True)
+    bucket_idx = bucket_idx.ravel()
+    if bucket_idx.max() == 0:
+        # Everything landed in a single cell
+        return sorted(_nms(np.arange(num)).tolist())
+
+    # Solve each cell independently
+    order = np.argsort(bucket_idx, kind='stable')
+    splits = np.flatnonzero(np.diff(bucket_idx[order])) + 1
+    groups = np.split(order, splits)
+    if workers > 0:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            kept = np.hstack(list(executor.map(_nms, groups)))
+    else:
+        kept = np.hstack([_nms(idxs) for idxs in groups])
+
+    # Recheck survivors that may overlap a box in a neighboring cell
+    offset = center[kept] - cell_xy[kept] * cell_size
+    dist_to_edge = np.minimum(offset, cell_size - offset).min(axis=1)
+    near_edge = dist_to_edge < diameter
+    if near_edge.any():
+        rectified = _nms(kept[near_edge])
+        kept = np.hstack([kept[~near_edge], rectified])
+    return sorted(kept.tolist())
+
+
 _impls = None
 
 
@@ -232,6 +347,18 @@ class _NMS_Impls():
         except Exception as ex:
             warnings.warn(
                 'optional cpu_nms is not available: {}'.format(str(ex)))
+
+        # The numba kernel is only used when explicitly requested. Checking
+        # for it does not import numba, which is slow.
+        from kwimage._util_numba import _numba_is_available
+        if _numba_is_available():
+            from kwimage.algo._nms_backend import numba_nms
+            _funcs['numba'] = numba_nms.numba_nms
+
+        from kwimage.algo._nms_backend import cv2_nms
+        if cv2_nms._cv2_nms_is_available():
+            _funcs['cv2'] = cv2_nms.cv2_nms
+
         try:
             if not DISABLE_C_EXTENSIONS:
                 if torch is not None and torch.cuda.is_available():
@@ -299,7 +426,8 @@ def _heuristic_auto_nms_impl(code, num, valid=None):
             preference = ['torchvision', 'cython_gpu', 'torch', 'numpy']
         if code == 'ndarray':
             # dict(cython_cpu=12226.1, numpy=7759.1, cython_gpu=3679.0, torch=1786.2)
-            preference = ['cython_cpu', 'numpy', 'cython_gpu', 'torch']
+            # cv2 is faster than numpy at every size (19us vs 34us @ 10)
+            preference = ['cython_cpu', 'cv2', 'numpy', 'cython_gpu', 'torch']
     elif num <= 100:
         if code == 'tensor0':
             # dict(cython_cpu=4160.7, torchvision=3089.9, cython_gpu=2261.8, torch=846.8)
@@ -309,7 +437,7 @@ def _heuristic_auto_nms_impl(code, num, valid=None):
             preference = ['torchvision', 'cython_gpu', 'torch', 'numpy']
         if code == 'ndarray':
             # dict(cython_cpu=12256.7, cython_gpu=3702.9, numpy=2311.3, torch=1738.0)
-            preference = ['cython_cpu', 'cython_gpu', 'numpy', 'torch']
+            preference = ['cython_cpu', 'cython_gpu', 'cv2', 'numpy', 'torch']
     elif num <= 200:
         if code == 'tensor0':
             # dict(cython_cpu=3460.8, torchvision=2912.9, cython_gpu=2125.2, torch=782.4)
@@ -319,7 +447,9 @@ def _heuristic_auto_nms_impl(code, num, valid=None):
             preference = ['torchvision', 'cython_gpu', 'torch', 'numpy']
         if code == 'ndarray':
             # dict(cython_cpu=8220.6, cython_gpu=3114.5, torch=1240.7, numpy=309.5)
-            preference = ['cython_cpu', 'cython_gpu', 'torch', 'numpy']
+            # Past ~128 boxes torchvision is worth the tensor conversion,
+            # but the compiled cpu loops still beat it.
+            preference = ['cython_cpu', 'cython_gpu', 'torchvision', 'torch', 'cv2', 'numpy']
     elif num <= 300:
         if code == 'tensor0':
             # dict(torchvision=2647.1, cython_cpu=2264.9, cython_gpu=1915.5, torch=672.0)
@@ -329,7 +459,7 @@ def _heuristic_auto_nms_impl(code, num, valid=None):
             preference = ['cython_gpu', 'torchvision', 'torch', 'numpy']
         if code == 'ndarray':
             # dict(cython_cpu=4085.6, cython_gpu=2944.4, torch=799.8, numpy=173.0)
-            preference = ['cython_cpu', 'cython_gpu', 'torch', 'numpy']
+            preference = ['cython_cpu', 'cython_gpu', 'torchvision', 'torch', 'cv2', 'numpy']
     else:
         if code == 'tensor0':
             # dict(torchvision=2585.5, cython_gpu=1868.7, cython_cpu=1650.6, torch=623.1)
@@ -339,7 +469,8 @@ def _heuristic_auto_nms_impl(code, num, valid=None):
             preference = ['cython_gpu', 'torchvision', 'torch', 'numpy']
         if code == 'ndarray':
             # dict(cython_gpu=2880.2, cython_cpu=2432.5, torch=511.9, numpy=114.0)
-            preference = ['cython_gpu', 'cython_cpu', 'torch', 'numpy']
+            # cv2 is ~3x faster than numpy here (3.5ms vs 10.6ms @ 1000)
+            preference = ['cython_gpu', 'cython_cpu', 'torchvision', 'torch', 'cv2', 'numpy']
 
     if valid:
         valid_pref = ub.oset(preference) & valid
@@ -356,7 +487,8 @@ def _heuristic_auto_nms_impl(code, num, valid=None):
 
 
 def non_max_supression(tlbr, scores, thresh, bias=0.0, classes=None,
-                       impl='auto', device_id=None):
+                       impl='auto', device_id=None, workers=0,
+                       iou_dtype=None):
     """
     Non-Maximum Suppression - remove redundant bounding boxes
 
@@ -371,9 +503,21 @@ def non_max_supression(tlbr, scores, thresh, bias=0.0, classes=None,
         bias (float): bias for iou computation either 0 or 1
         classes (ndarray[int64] or None): integer classes.
             If specified NMS is done on a perclass basis.
-        impl (str): implementation can be auto, python, cython_cpu, or gpu
+        impl (str): implementation can be auto, numpy, numba, cv2,
+            cython_cpu, or gpu. If 'fast', uses the vectorized Fast-NMS approximation from
+            YOLACT, which also suppresses boxes that overlap an already
+            suppressed box. It is not exact, so it is never chosen by 'auto'.
         device_id (int): used if impl is gpu, device id to work on. If not
             specified `torch.cuda.current_device()` is used.
+        workers (int, default=0): if positive and classes are specified,
+            each class is handled in a thread pool with this many workers.
+            This only helps for impls that release the GIL (e.g. cython_cpu
+            and numba) when the per-class problems are large.
+        iou_dtype (str | torch.dtype, default=None): only used if impl is
+            'fast'. If specified (e.g. 'float16') and the boxes are CUDA
+            tensors, the pairwise IoU matrix is computed in this reduced
+            precision dtype. See
+            :func:`kwimage.algo._nms_backend.fast_nms.fast_nms`.
 
     Notes:
         Using impl='cython_gpu' may result in an CUDA memory error that is not exposed
@@ -458,6 +602,24 @@ def non_max_supression(tlbr, scores, thresh, bias=0.0, classes=None,
         >>> assert 'numpy' in solutions
         >>> print('solutions = {}'.format(ub.repr2(solutions, nl=1)))
         >>> assert ub.allsame(solutions.values())
+        >>> # Classes can be handled in parallel
+        >>> classes = np.array([0, 1, 0, 1, 0, 1, 0])
+        >>> keep1 = non_max_supression(tlbr, scores, thresh, classes=classes)
+        >>> keep2 = non_max_supression(tlbr, scores, thresh, classes=classes,
+        >>>                            workers=2)
+        >>> assert list(keep1) == list(keep2)
+        >>> # Classes are returned in the order they first appear
+        >>> keep = non_max_supression(tlbr, scores, 1.0, classes=1 - classes,
+        >>>                           impl='numpy')
+        >>> assert list(keep) == [6, 4, 2, 0, 5, 3, 1]
+        >>> if 'torchvision' in available_nms_impls():
+        >>>     # torchvision handles all classes in one batched call
+        >>>     keep3 = non_max_supression(tlbr, scores, thresh,
+        >>>                                classes=classes, impl='torchvision')
+        >>>     assert sorted(keep3) == sorted(keep1)
+        >>> # Fast-NMS suppresses the chain of boxes more aggressively
+        >>> keep = non_max_supression(tlbr, scores, thresh, impl='fast')
+        >>> assert set(keep) <= set(solutions['numpy'])
 
     CommandLine:
         xdoctest -m ~/code/kwimage/kwimage/algo/algo_nms.py non_max_supression
@@ -481,6 +643,20 @@ def non_max_supression(tlbr, scores, thresh, bias=0.0, classes=None,
         >>> assert 'numpy' in solutions
         >>> print('solutions = {}'.format(ub.repr2(solutions, nl=1)))
         >>> assert ub.allsame(solutions.values())
+
+    Example:
+        >>> # xdoctest: +REQUIRES(module:torch)
+        >>> # Fast-NMS can compute its IoU matrix in half precision on the GPU
+        >>> import torch
+        >>> import kwimage
+        >>> if torch.cuda.is_available():
+        >>>     boxes = kwimage.Boxes.random(100, rng=0).scale(100).to_tlbr()
+        >>>     tlbr = torch.from_numpy(boxes.data).float().cuda()
+        >>>     scores = torch.rand(100).cuda()
+        >>>     keep1 = non_max_supression(tlbr, scores, 0.5, impl='fast')
+        >>>     keep2 = non_max_supression(tlbr, scores, 0.5, impl='fast',
+        >>>                                iou_dtype='float16')
+        >>>     assert len(set(keep1) ^ set(keep2)) <= 2
     """
 
     if impl == 'cpu':
@@ -534,16 +710,52 @@ def non_max_supression(tlbr, scores, thresh, bias=0.0, classes=None,
         if not found:
             raise KeyError('Unknown impls={}'.format(impl))
 
+    if impl == 'fast':
+        # Fast-NMS handles all classes in one batch and is not registered
+        # with the other impls because its results are not identical.
+        from kwimage.algo._nms_backend.fast_nms import fast_nms
+        keep = fast_nms(tlbr, scores, thresh, bias=float(bias),
+                        classes=classes, iou_dtype=iou_dtype)
+        return kwarray.ArrayAPI.numpy(keep)
+
+    if classes is not None and impl == 'torchvision':
+        # torchvision solves every class in one call on the boxes' device
+        import torchvision
+        api = kwarray.ArrayAPI.coerce(tlbr)
+        tlbr = api.tensor(tlbr).float().contiguous()
+        scores = api.tensor(scores).float().contiguous()
+        classes = torch.as_tensor(classes, dtype=torch.int64,
+                                  device=tlbr.device)
+        keep = torchvision.ops.batched_nms(tlbr, scores, classes, thresh)
+        return api.numpy(keep)
+
     if classes is not None:
-        keep = []
-        for idxs in ub.group_items(range(len(classes)), classes).values():
+        def _class_nms(idxs):
             # cls_tlbr = tlbr.take(idxs, axis=0)
             # cls_scores = scores.take(idxs, axis=0)
             cls_tlbr = tlbr[idxs]
             cls_scores = scores[idxs]
             cls_keep = non_max_supression(cls_tlbr, cls_scores, thresh=thresh,
                                           bias=bias, impl=impl)
-            keep.extend(list(ub.take(idxs, cls_keep)))
+            return idxs[np.asarray(cls_keep, dtype=np.int64)].tolist()
+
+        # Bucket the indices by class with one stable sort
+        classes = kwarray.ArrayAPI.numpy(classes)
+        sortx = np.argsort(classes, kind='stable')
+        splits = np.flatnonzero(np.diff(classes[sortx])) + 1
+        groups = np.split(sortx, splits)
+        # Visit the classes in the order they first appear. The stable sort
+        # puts the first index of each class at the front of its group.
+        groups.sort(key=lambda idxs: idxs[0])
+        if workers > 0 and len(groups) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_class_nms, groups))
+        else:
+            results = map(_class_nms, groups)
+        keep = []
+        for cls_keep in results:
+            keep.extend(cls_keep)
         return keep
     else:
 
@@ -555,8 +767,8 @@ def non_max_supression(tlbr, scores, thresh, bias=0.0, classes=None,
             keep = func(tlbr, scores, thresh, bias=float(bias))
         elif impl == 'torch' or impl == 'torchvision':
             api = kwarray.ArrayAPI.coerce(tlbr)
-            tlbr = api.tensor(tlbr).float()
-            scores = api.tensor(scores).float()
+            tlbr = api.tensor(tlbr).float().contiguous()
+            scores = api.tensor(scores).float().contiguous()
             # Default output of torch impl is a mask
             if impl == 'torchvision':
                 # if bias != 1:
@@ -576,8 +788,10 @@ def non_max_supression(tlbr, scores, thresh, bias=0.0, classes=None,
             nms = _impls._funcs[impl]
             tlbr = kwarray.ArrayAPI.numpy(tlbr)
             scores = kwarray.ArrayAPI.numpy(scores)
-            tlbr = tlbr.astype(np.float32)
-            scores = scores.astype(np.float32)
+            # The native kernels want contiguous float32 buffers. Unlike
+            # astype, this does not copy inputs that already are.
+            tlbr = np.ascontiguousarray(tlbr, dtype=np.float32)
+            scores = np.ascontiguousarray(scores, dtype=np.float32)
             if impl == 'cython_gpu':
                 # TODO: if the data is already on a torch GPU can we just
                 # use it?
@@ -586,7 +800,7 @@ def non_max_supression(tlbr, scores, thresh, bias=0.0, classes=None,
                     device_id = torch.cuda.current_device()
                 keep = nms(tlbr, scores, float(thresh), bias=float(bias),
                            device_id=device_id)
-            elif impl == 'cython_cpu':
+            elif impl in {'cython_cpu', 'numba', 'cv2'}:
                 keep = nms(tlbr, scores, float(thresh), bias=float(bias))
             else:
                 raise KeyError(impl)
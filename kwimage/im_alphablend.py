@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 import numpy as np
+import ubelt as ub
 from . import im_core
 
+# Tile size and coverage threshold used to skip occluded regions in
+# :func:`overlay_alpha_layers`
+_LAYER_TILE_SIZE = 64
+_OPAQUE_THRESH = 1 - 1e-6
+
 
 def overlay_alpha_layers(layers, keepalpha=True, dtype=np.float32):
     """
@@ -32,22 +38,68 @@ def overlay_alpha_layers(layers, keepalpha=True, dtype=np.float32):
         >>> kwplot.autompl()
         >>> kwplot.imshow(stacked)
         >>> kwplot.show_if_requested()
+
+    Example:
+        >>> # Layers below an opaque region do not contribute
+        >>> top = np.zeros((100, 100, 4), dtype=np.float32)
+        >>> top[:, 0:50] = (1, 0, 0, 1)
+        >>> mid = np.full((100, 100, 4), fill_value=.5, dtype=np.float32)
+        >>> bot = np.full((100, 100, 4), fill_value=1.0, dtype=np.float32)
+        >>> stacked = overlay_alpha_layers([top, mid, bot])
+        >>> expected = overlay_alpha_images(top, overlay_alpha_images(mid, bot))
+        >>> assert np.allclose(stacked, expected)
+        >>> assert np.all(stacked[:, 0:50] == (1, 0, 0, 1))
     """
-    layer_iter = iter(layers)
-    img1 = next(layer_iter)
+    layers = list(layers)
+    img1 = layers[0]
     rgb1, alpha1 = _prep_rgb_alpha(img1, dtype=dtype)
+    if len(layers) > 1:
+        rgb1, alpha1 = _overlay_premultiplied(rgb1, alpha1, layers[1:], dtype)
 
-    for img2 in layer_iter:
-        rgb2, alpha2 = _prep_rgb_alpha(img2, dtype=dtype)
-        rgb1, alpha1 = _alpha_blend_inplace(rgb1, alpha1, rgb2, alpha2)
-
-    if keepalpha:
-        raster = np.dstack([rgb1, alpha1[..., None]])
-    else:
-        raster = rgb1
+    raster = _assemble_raster(rgb1, alpha1, keepalpha)
     return raster
 
 
+def _overlay_premultiplied(rgb1, alpha1, lower_layers, dtype):
+    """
+    Helper for :func:`overlay_alpha_layers` that places rgb1 / alpha1 on top
+    of the lower layers.
+
+    Composites front-to-back using premultiplied planar accumulators. Once
+    the accumulated coverage of a tile is opaque, the layers underneath it
+    cannot contribute and the tile is skipped.
+    """
+    acc_alpha = np.array(alpha1, copy=True)
+    acc_rgb = np.moveaxis(rgb1, -1, 0) * acc_alpha
+    h, w = acc_alpha.shape[0:2]
+    tile = _LAYER_TILE_SIZE
+
+    for img2 in lower_layers:
+        if acc_alpha.min() >= _OPAQUE_THRESH:
+            break
+        rgb2, alpha2 = _prep_rgb_alpha(img2, dtype=dtype)
+        planes2 = np.moveaxis(rgb2, -1, 0)
+        for y in range(0, h, tile):
+            for x in range(0, w, tile):
+                sl = (slice(y, y + tile), slice(x, x + tile))
+                tile_alpha = acc_alpha[sl]
+                if tile_alpha.min() >= _OPAQUE_THRESH:
+                    continue
+                # the amount of the lower layer that shows through
+                weight = (1.0 - tile_alpha) * alpha2[sl]
+                tile_rgb = acc_rgb[(slice(None),) + sl]
+                tile_rgb += planes2[(slice(None),) + sl] * weight
+                tile_alpha += weight
+
+    # Convert back to straight (non-premultiplied) alpha
+    with np.errstate(invalid='ignore'):
+        acc_rgb /= acc_alpha
+    if not np.all(acc_alpha):
+        acc_rgb[:, acc_alpha == 0] = 0
+    rgb3 = np.moveaxis(acc_rgb, 0, -1)
+    return rgb3, acc_alpha
+
+
 def overlay_alpha_images(img1, img2, keepalpha=True, dtype=np.float32,
                          impl='inplace'):
     """
@@ -59,7 +111,13 @@ def overlay_alpha_images(img1, img2, keepalpha=True, dtype=np.float32,
         img2 (ndarray): base image to superimpose on
         keepalpha (bool): if False, the alpha channel is removed after blending
         dtype (np.dtype): format for blending computation (defaults to float32)
-        impl (str, default=inplace): code specifying the backend implementation
+        impl (str, default=inplace): code specifying the backend
+            implementation. Can be simple, inplace, premul, numexpr1,
+            numexpr2, numba, or avx2. The premul option blends premultiplied
+            colors. The avx2 option requires the compiled C extension and
+            always works in float32. The numba option is the fastest per
+            call, but its first call in a process costs ~0.2s to load the
+            kernel.
 
     Returns:
         ndarray: raster: the blended images
@@ -83,43 +141,62 @@ def overlay_alpha_images(img1, img2, keepalpha=True, dtype=np.float32,
         >>> kwplot.imshow(img3)
         >>> kwplot.show_if_requested()
     """
-    rgb1, alpha1 = _prep_rgb_alpha(img1, dtype=dtype)
-    rgb2, alpha2 = _prep_rgb_alpha(img2, dtype=dtype)
+    try:
+        blend_func = _IMPLS[impl]
+    except KeyError:
+        raise ValueError('unknown impl={}'.format(impl))
+
+    premultiply = impl == 'premul'
+    rgb1, alpha1 = _prep_rgb_alpha(img1, dtype=dtype, premultiply=premultiply)
+    rgb2, alpha2 = _prep_rgb_alpha(img2, dtype=dtype, premultiply=premultiply)
 
     # Perform the core alpha blending algorithm
-    if impl == 'simple':
-        rgb3, alpha3 = _alpha_blend_simple(rgb1, alpha1, rgb2, alpha2)
-    elif impl == 'inplace':
-        rgb3, alpha3 = _alpha_blend_inplace(rgb1, alpha1, rgb2, alpha2)
-    elif impl == 'numexpr1':
-        rgb3, alpha3 = _alpha_blend_numexpr1(rgb1, alpha1, rgb2, alpha2)
-    elif impl == 'numexpr2':
-        rgb3, alpha3 = _alpha_blend_numexpr2(rgb1, alpha1, rgb2, alpha2)
-    else:
-        raise ValueError('unknown impl={}'.format(impl))
+    rgb3, alpha3 = blend_func(rgb1, alpha1, rgb2, alpha2)
 
+    raster = _assemble_raster(rgb3, alpha3, keepalpha)
+    return raster
+
+
+def _assemble_raster(rgb, alpha, keepalpha):
+    """
+    Interleaves the (possibly planar) blended rgb and alpha channels into a
+    single contiguous output image.
+    """
     if keepalpha:
-        raster = np.dstack([rgb3, alpha3[..., None]])
-        # Note: if we want to output a 255 img we could do something like this
-        # out = np.zeros_like(img1)
-        # out[..., :3] = rgb3
-        # out[..., 3] = alpha3
+        raster = np.empty(rgb.shape[0:2] + (4,), dtype=rgb.dtype)
+        raster[..., 0:3] = rgb
+        raster[..., 3] = alpha
     else:
-        raster = rgb3
+        raster = np.ascontiguousarray(rgb)
     return raster
 
 
-def _prep_rgb_alpha(img, dtype=np.float32):
+def _prep_rgb_alpha(img, dtype=np.float32, premultiply=False):
+    """
+    Splits an image into its rgb and alpha components.
+
+    Args:
+        img (ndarray): image with 1, 3, or 4 channels
+        dtype (np.dtype): float type for the outputs
+        premultiply (bool, default=False): if True the returned rgb values
+            are multiplied by alpha (for use with :func:`_alpha_blend_premul`)
+    """
     img = im_core.ensure_float01(img, dtype=dtype, copy=False)
-    img = im_core.atleast_3channels(img, copy=False)
+    img = im_core.atleast_3channels(img, copy=False, readonly=True)
     c = im_core.num_channels(img)
 
     if c == 4:
-        # rgb = np.ascontiguousarray(img[..., 0:3])
-        # alpha = np.ascontiguousarray(img[..., 3])
+        # These are strided views into the interleaved image. Backends that
+        # want contiguous planes (e.g. the inplace one) make their own copy.
         rgb = img[..., 0:3]
         alpha = img[..., 3]
+        if premultiply:
+            # This needs a new array anyway, so write it as contiguous planes
+            planes = np.empty((3,) + alpha.shape, dtype=img.dtype)
+            np.multiply(np.moveaxis(rgb, -1, 0), alpha, out=planes)
+            rgb = np.moveaxis(planes, 0, -1)
     else:
+        # Premultiplying by an opaque alpha is a no-op
         rgb = img
         alpha = np.ones_like(img[..., 0])
     return rgb, alpha
@@ -146,7 +223,9 @@ def _alpha_blend_simple(rgb1, alpha1, rgb2, alpha2):
 def _alpha_blend_inplace(rgb1, alpha1, rgb2, alpha2):
     """
     Uglier but faster(? maybe not) version of the core alpha blending algorithm
-    using preallocation and in-place computation where possible.
+    using preallocation and in-place computation where possible. Channels are
+    copied into contiguous planes and the returned rgb3 is a (H, W, 3) view
+    of planar (3, H, W) data.
 
     SeeAlso:
         _alpha_blend_simple - alternative implementation
@@ -163,30 +242,65 @@ def _alpha_blend_inplace(rgb1, alpha1, rgb2, alpha2):
         >>> s1, s2 = _alpha_blend_simple(rgb1, alpha1, rgb2, alpha2)
         >>> assert np.all(f1 == s1) and np.all(f2 == s2)
     """
-    rgb3 = np.empty_like(rgb1)
-    temp_rgb = np.empty_like(rgb1)
+    # Blend each channel as a contiguous (H, W) plane. This is a no-op view
+    # when the inputs come from a previous inplace blend.
+    planes1 = np.ascontiguousarray(np.moveaxis(rgb1, -1, 0))
+    planes2 = np.ascontiguousarray(np.moveaxis(rgb2, -1, 0))
+    alpha1 = np.ascontiguousarray(alpha1)
+    alpha2 = np.ascontiguousarray(alpha2)
+
+    planes3 = np.empty_like(planes1)
     alpha3 = np.empty_like(alpha1)
     temp_alpha = np.empty_like(alpha1)
+    temp_plane = np.empty_like(planes1[0])
 
-    # hold (1 - alpha1)
+    # hold alpha2 * (1 - alpha1)
     np.subtract(1, alpha1, out=temp_alpha)
+    np.multiply(alpha2, temp_alpha, out=temp_alpha)
 
     # alpha3
-    np.copyto(dst=alpha3, src=temp_alpha)
-    np.multiply(alpha2, alpha3, out=alpha3)
-    np.add(alpha1, alpha3, out=alpha3)
+    np.add(alpha1, temp_alpha, out=alpha3)
 
-    # numer1
-    np.multiply(rgb1, alpha1[..., None], out=rgb3)
+    # removing errstate is actually a significant speedup
+    with np.errstate(invalid='ignore'):
+        for plane1, plane2, plane3 in zip(planes1, planes2, planes3):
+            # (numer1 + numer2) / alpha3
+            np.multiply(plane1, alpha1, out=plane3)
+            np.multiply(plane2, temp_alpha, out=temp_plane)
+            np.add(plane3, temp_plane, out=plane3)
+            np.divide(plane3, alpha3, out=plane3)
+    if not np.all(alpha3):
+        planes3[:, alpha3 == 0] = 0
+    rgb3 = np.moveaxis(planes3, 0, -1)
+    return rgb3, alpha3
 
-    # numer2
-    np.multiply(alpha2, temp_alpha, out=temp_alpha)
-    np.multiply(rgb2, temp_alpha[..., None], out=temp_rgb)
 
-    # (numer1 + numer2)
-    np.add(rgb3, temp_rgb, out=rgb3)
+def _alpha_blend_premul(pm_rgb1, alpha1, pm_rgb2, alpha2):
+    """
+    Core alpha blending algorithm for premultiplied rgb inputs (see the
+    premultiply option of :func:`_prep_rgb_alpha`). The output rgb is not
+    premultiplied.
 
-    # removing errstate is actually a significant speedup
+    SeeAlso:
+        _alpha_blend_simple - alternative implementation
+
+    Example:
+        >>> rng = np.random.RandomState(0)
+        >>> rgb1, rgb2 = rng.rand(10, 10, 3), rng.rand(10, 10, 3)
+        >>> alpha1, alpha2 = rng.rand(10, 10), rng.rand(10, 10)
+        >>> alpha1[0:2] = alpha2[0:2] = 0
+        >>> pm_rgb1 = rgb1 * alpha1[..., None]
+        >>> pm_rgb2 = rgb2 * alpha2[..., None]
+        >>> f1, f2 = _alpha_blend_premul(pm_rgb1, alpha1, pm_rgb2, alpha2)
+        >>> s1, s2 = _alpha_blend_simple(rgb1, alpha1, rgb2, alpha2)
+        >>> assert np.allclose(f1, s1) and np.allclose(f2, s2)
+    """
+    c_alpha1 = 1.0 - alpha1
+    alpha3 = alpha2 * c_alpha1
+    alpha3 += alpha1
+
+    rgb3 = pm_rgb2 * c_alpha1[..., None]
+    rgb3 += pm_rgb1
     with np.errstate(invalid='ignore'):
         np.divide(rgb3, alpha3[..., None], out=rgb3)
     if not np.all(alpha3):
@@ -203,27 +317,132 @@ def _alpha_blend_numexpr1(rgb1, alpha1, rgb2, alpha2):
     alpha3_ = alpha3[..., None]  # NOQA
     rgb3 = numexpr.evaluate('((rgb1 * alpha1_) + (rgb2 * alpha2_ * (1.0 - alpha1_))) / alpha3_')
     rgb3[alpha3 == 0] = 0
+    return rgb3, alpha3
 
 
 def _alpha_blend_numexpr2(rgb1, alpha1, rgb2, alpha2):
-    """ Alternative. Not well optimized """
+    """
+    Computes the core alpha blending algorithm with one fused numexpr
+    expression per output.
+
+    The constants are passed in as typed scalars, otherwise numexpr would
+    promote float32 inputs to float64.
+
+    Example:
+        >>> # xdoctest: +REQUIRES(module:numexpr)
+        >>> rng = np.random.RandomState(0)
+        >>> rgb1, rgb2 = rng.rand(10, 10, 3), rng.rand(10, 10, 3)
+        >>> alpha1, alpha2 = rng.rand(10, 10), rng.rand(10, 10)
+        >>> alpha1[0:2] = alpha2[0:2] = 0
+        >>> f1, f2 = _alpha_blend_numexpr2(rgb1, alpha1, rgb2, alpha2)
+        >>> s1, s2 = _alpha_blend_simple(rgb1, alpha1, rgb2, alpha2)
+        >>> assert np.allclose(f1, s1) and np.allclose(f2, s2)
+    """
     import numexpr
-    c_alpha1 = numexpr.evaluate('1.0 - alpha1')
-    alpha3 = numexpr.evaluate('alpha1 + alpha2 * c_alpha1')
+    one = alpha1.dtype.type(1)
+    zero = alpha1.dtype.type(0)
+    alpha3 = numexpr.evaluate('alpha1 + alpha2 * (one - alpha1)', local_dict={
+        'alpha1': alpha1, 'alpha2': alpha2, 'one': one})
+    rgb3 = numexpr.evaluate(
+        'where(alpha3 == zero, zero, '
+        '(rgb1 * alpha1 + rgb2 * alpha2 * (one - alpha1)) / alpha3)',
+        local_dict={
+            'rgb1': rgb1, 'rgb2': rgb2,
+            'alpha1': alpha1[..., None], 'alpha2': alpha2[..., None],
+            'alpha3': alpha3[..., None], 'one': one, 'zero': zero})
+    return rgb3, alpha3
 
-    c_alpha1_ = c_alpha1[..., None]  # NOQA
-    alpha1_ = alpha1[..., None]  # NOQA
-    alpha2_ = alpha2[..., None]  # NOQA
-    alpha3_ = alpha3[..., None]  # NOQA
 
-    numer1 = numexpr.evaluate('rgb1 * alpha1_')  # NOQA
-    numer2 = numexpr.evaluate('rgb2 * (alpha2_ * c_alpha1_)')  # NOQA
-    with np.errstate(invalid='ignore'):
-        rgb3 = numexpr.evaluate('(numer1 + numer2) / alpha3_')
-    rgb3[alpha3 == 0] = 0
+def _alpha_blend_numba(rgb1, alpha1, rgb2, alpha2):
+    """
+    Computes the core alpha blending algorithm in a single fused pass over
+    the pixels using a parallel numba kernel.
+
+    SeeAlso:
+        _alpha_blend_inplace - alternative implementation
+
+    Example:
+        >>> # xdoctest: +REQUIRES(module:numba)
+        >>> rng = np.random.RandomState(0)
+        >>> rgb1, rgb2 = rng.rand(10, 10, 3), rng.rand(10, 10, 3)
+        >>> alpha1, alpha2 = rng.rand(10, 10), rng.rand(10, 10)
+        >>> f1, f2 = _alpha_blend_numba(rgb1, alpha1, rgb2, alpha2)
+        >>> s1, s2 = _alpha_blend_simple(rgb1, alpha1, rgb2, alpha2)
+        >>> assert np.allclose(f1, s1) and np.allclose(f2, s2)
+        >>> alpha1, alpha2 = np.zeros((10, 10)), np.zeros((10, 10))
+        >>> f1, f2 = _alpha_blend_numba(rgb1, alpha1, rgb2, alpha2)
+        >>> s1, s2 = _alpha_blend_simple(rgb1, alpha1, rgb2, alpha2)
+        >>> assert np.all(f1 == s1) and np.all(f2 == s2)
+    """
+    kernel = _numba_alpha_blend_kernel()
+    rgb3 = np.empty(rgb1.shape, dtype=rgb1.dtype)
+    alpha3 = np.empty(alpha1.shape, dtype=alpha1.dtype)
+    kernel(rgb1, alpha1, rgb2, alpha2, rgb3, alpha3)
     return rgb3, alpha3
 
 
+@ub.memoize
+def _numba_alpha_blend_kernel():
+    """
+    Lazily compiles the numba kernel used by :func:`_alpha_blend_numba`
+    """
+    import numba
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _kernel(rgb1, alpha1, rgb2, alpha2, rgb3, alpha3):
+        h, w = alpha1.shape
+        for r in numba.prange(h):
+            for c in range(w):
+                a1 = alpha1[r, c]
+                a2 = alpha2[r, c] * (1.0 - a1)
+                a3 = a1 + a2
+                alpha3[r, c] = a3
+                if a3 == 0:
+                    for k in range(3):
+                        rgb3[r, c, k] = 0
+                else:
+                    for k in range(3):
+                        rgb3[r, c, k] = (rgb1[r, c, k] * a1 +
+                                         rgb2[r, c, k] * a2) / a3
+    return _kernel
+
+
+def _alpha_blend_avx2(rgb1, alpha1, rgb2, alpha2):
+    """
+    Computes the core alpha blending algorithm using the compiled SIMD
+    (AVX2 / FMA) C extension. The computation is always done in float32.
+
+    SeeAlso:
+        _alpha_blend_inplace - alternative implementation
+
+    Example:
+        >>> # xdoctest: +REQUIRES(module:kwimage.algo._alphablend_backend.cython_alphablend)
+        >>> rng = np.random.RandomState(0)
+        >>> rgb1, rgb2 = rng.rand(10, 10, 3), rng.rand(10, 10, 3)
+        >>> alpha1, alpha2 = rng.rand(10, 10), rng.rand(10, 10)
+        >>> f1, f2 = _alpha_blend_avx2(rgb1, alpha1, rgb2, alpha2)
+        >>> s1, s2 = _alpha_blend_simple(rgb1, alpha1, rgb2, alpha2)
+        >>> assert np.allclose(f1, s1, atol=1e-5) and np.allclose(f2, s2, atol=1e-5)
+    """
+    cython_alphablend = _load_alphablend_ext()
+    if cython_alphablend is None:
+        raise ImportError('the cython_alphablend extension is not available')
+    return cython_alphablend.alpha_blend(rgb1, alpha1, rgb2, alpha2)
+
+
+@ub.memoize
+def _load_alphablend_ext():
+    import os
+    if os.environ.get('KWIMAGE_DISABLE_C_EXTENSIONS', ''):
+        return None
+    try:
+        from kwimage.algo._alphablend_backend import cython_alphablend
+    except ImportError:
+        return None
+    else:
+        return cython_alphablend
+
+
 def ensure_alpha_channel(img, alpha=1.0, dtype=np.float32, copy=False):
     """
     Returns the input image with 4 channels.
@@ -241,20 +460,52 @@ def ensure_alpha_channel(img, alpha=1.0, dtype=np.float32, copy=False):
     Raises:
         ValueError - if the input image does not have 1, 3, or 4 input channels
             or if the image cannot be converted into a float01 representation
+
+    Example:
+        >>> img = np.random.rand(5, 5, 4).astype(np.float32)
+        >>> assert ensure_alpha_channel(img) is img
+        >>> assert ensure_alpha_channel(img, copy=True) is not img
+        >>> assert ensure_alpha_channel(img[..., 0:3]).shape == (5, 5, 4)
+        >>> gray = np.random.rand(5, 5).astype(np.float32)
+        >>> rgba = ensure_alpha_channel(gray, alpha=.5)
+        >>> assert np.all(rgba[..., 0] == gray) and np.all(rgba[..., 2] == gray)
+        >>> assert np.all(rgba[..., 3] == .5)
     """
+    if (not copy and isinstance(img, np.ndarray) and img.ndim == 3 and
+            img.shape[2] == 4 and img.dtype == dtype):
+        # Fast path: the image is already a float RGBA image
+        return img
     img = im_core.ensure_float01(img, dtype=dtype, copy=copy)
     c = im_core.num_channels(img)
     if c == 4:
         return img
-    else:
+    elif c == 3 or c == 1:
+        # Write the color and alpha channels into a single new image
+        h, w = img.shape[0:2]
         if isinstance(alpha, np.ndarray):
-            alpha_channel = alpha
+            alpha = alpha.reshape(h, w)
+            out_dtype = np.result_type(img, alpha)
         else:
-            alpha_channel = np.full(img.shape[0:2], fill_value=alpha, dtype=img.dtype)
+            out_dtype = img.dtype
+        out = np.empty((h, w, 4), dtype=out_dtype)
         if c == 3:
-            return np.dstack([img, alpha_channel])
-        elif c == 1:
-            return np.dstack([img, img, img, alpha_channel])
+            out[..., 0:3] = img
         else:
-            raise ValueError(
-                'Cannot ensure alpha. Input image has c={} channels'.format(c))
+            out[..., 0:3] = img.reshape(h, w, 1)
+        out[..., 3] = alpha
+        return out
+    else:
+        raise ValueError(
+            'Cannot ensure alpha. Input image has c={} channels'.format(c))
+
+
+# Maps the impl argument of overlay_alpha_images to a blending backend
+_IMPLS = {
+    'simple': _alpha_blend_simple,
+    'inplace': _alpha_blend_inplace,
+    'premul': _alpha_blend_premul,
+    'numexpr1': _alpha_blend_numexpr1,
+    'numexpr2': _alpha_blend_numexpr2,
+    'numba': _alpha_blend_numba,
+    'avx2': _alpha_blend_avx2,
+}
@@ -29,17 +29,13 @@ def num_channels(img):
     """
     ndims = img.ndim
     if ndims == 2:
-        n_channels = 1
-    elif ndims == 3 and img.shape[2] == 3:
-        n_channels = 3
-    elif ndims == 3 and img.shape[2] == 4:
-        n_channels = 4
-    elif ndims == 3 and img.shape[2] == 1:
-        n_channels = 1
-    else:
-        raise ValueError('Cannot determine number of channels '
-                         'for img.shape={}'.format(img.shape))
-    return n_channels
+        return 1
+    if ndims == 3:
+        n_channels = img.shape[2]
+        if n_channels == 3 or n_channels == 4 or n_channels == 1:
+            return n_channels
+    raise ValueError('Cannot determine number of channels '
+                     'for img.shape={}'.format(img.shape))
 
 
 def ensure_float01(img, dtype=np.float32, copy=True):
@@ -63,7 +59,12 @@ def ensure_float01(img, dtype=np.float32, copy=True):
         array([[0. , 0.5, 1. ]], dtype=float32)
         >>> ensure_float01(np.array([[0, 1, 200]]))
         array([[0..., 0.0039..., 0.784...]], dtype=float32)
+        >>> img = np.random.rand(3, 3).astype(np.float32)
+        >>> assert ensure_float01(img, copy=False) is img
     """
+    if not copy and img.dtype.kind == 'f' and img.dtype == dtype:
+        # The image is already in the requested format
+        return img
     if img.dtype.kind in ('i', 'u'):
         if img.dtype.kind != 'u' or img.dtype.itemsize != 1:
             # Only check min/max if the image is not a uint8
@@ -73,7 +74,10 @@ def ensure_float01(img, dtype=np.float32, copy=True):
                     'The image type is int, but its values are not '
                     'between 0 and 255. Image stats are {}'.format(
                         kwarray.stats_dict(img)))
-        img_ = img.astype(dtype, copy=copy) / 255.0
+        # Cast and scale in a single pass into one output buffer
+        dtype = np.dtype(dtype)
+        img_ = np.empty(img.shape, dtype=dtype)
+        np.divide(img, dtype.type(255.0), out=img_)
     else:
         img_ = img.astype(dtype, copy=copy)
     return img_
@@ -132,7 +136,7 @@ def ensure_uint255(img, copy=True):
 #             pass
 
 
-def make_channels_comparable(img1, img2, atleast3d=False):
+def make_channels_comparable(img1, img2, atleast3d=False, readonly=False):
     """
     Broadcasts image arrays so they can have elementwise operations applied
 
@@ -141,6 +145,9 @@ def make_channels_comparable(img1, img2, atleast3d=False):
         img2 (ndarray): second image
         atleast3d (bool, default=False): if true we ensure that the channel
             dimension exists (only relevant for 1-channel images)
+        readonly (bool, default=False): if True, a grayscale image that is
+            expanded to 3 channels is returned as a read-only broadcast view
+            of the input instead of a new array.
 
     Example:
         >>> import itertools as it
@@ -176,13 +183,13 @@ def make_channels_comparable(img1, img2, atleast3d=False):
         elif len(img1.shape) == 3 and len(img2.shape) == 2:
             # Image 2 is grayscale
             if c1 == 3:
-                img2 = np.tile(img2[..., None], 3)
+                img2 = _expand_gray(img2[..., None], readonly)
             else:
                 img2 = img2[..., None]
         elif len(img1.shape) == 2 and len(img2.shape) == 3:
             # Image 1 is grayscale
             if c2 == 3:
-                img1 = np.tile(img1[..., None], 3)
+                img1 = _expand_gray(img1[..., None], readonly)
             else:
                 img1 = img1[..., None]
         elif len(img1.shape) == 3 and len(img2.shape) == 3:
@@ -198,13 +205,13 @@ def make_channels_comparable(img1, img2, atleast3d=False):
                 # raise AssertionError('UNREACHABLE: Both are 3-color')
                 pass
             elif c1 == 1 and c2 == 3:
-                img1 = np.tile(img1, 3)
+                img1 = _expand_gray(img1, readonly)
             elif c1 == 3 and c2 == 1:
-                img2 = np.tile(img2, 3)
+                img2 = _expand_gray(img2, readonly)
             elif c1 == 1 and c2  == 4:
-                img1 = np.dstack((np.tile(img1, 3), _alpha_fill_for(img1)))
+                img1 = np.dstack((img1, img1, img1, _alpha_fill_for(img1)))
             elif c1 == 4 and c2  == 1:
-                img2 = np.dstack((np.tile(img2, 3), _alpha_fill_for(img2)))
+                img2 = np.dstack((img2, img2, img2, _alpha_fill_for(img2)))
             elif c1 == 3 and c2  == 4:
                 img1 = np.dstack((img1, _alpha_fill_for(img1)))
             elif c1 == 4 and c2  == 3:
@@ -216,6 +223,14 @@ def make_channels_comparable(img1, img2, atleast3d=False):
     return img1, img2
 
 
+def _expand_gray(img, readonly):
+    """ expands a (H, W, 1) image to (H, W, 3) """
+    if readonly:
+        return np.broadcast_to(img, img.shape[0:2] + (3,))
+    else:
+        return np.tile(img, 3)
+
+
 def _alpha_fill_for(img):
     """ helper for make_channels_comparable """
     fill_value = (255 if img.dtype.kind in ('i', 'u') else 1)
@@ -224,7 +239,7 @@ def _alpha_fill_for(img):
     return alpha_chan
 
 
-def atleast_3channels(arr, copy=True):
+def atleast_3channels(arr, copy=True, readonly=False):
     r"""
     Ensures that there are 3 channels in the image
 
@@ -232,6 +247,9 @@ def atleast_3channels(arr, copy=True):
         arr (ndarray[N, M, ...]): the image
         copy (bool): Always copies if True, if False, then copies only when the
             size of the array must change.
+        readonly (bool, default=False): if True and copy is False, a
+            grayscale image is returned as a read-only broadcast view instead
+            of a new array.
 
     Returns:
         ndarray: with shape (N, M, C), where C in {3, 4}
@@ -241,15 +259,21 @@ def atleast_3channels(arr, copy=True):
         >>> assert atleast_3channels(np.zeros((10, 10, 1))).shape[-1] == 3
         >>> assert atleast_3channels(np.zeros((10, 10, 3))).shape[-1] == 3
         >>> assert atleast_3channels(np.zeros((10, 10, 4))).shape[-1] == 4
+        >>> gray = np.random.rand(10, 10)
+        >>> assert atleast_3channels(gray, copy=False).flags.writeable
+        >>> view = atleast_3channels(gray, copy=False, readonly=True)
+        >>> assert not view.flags.writeable
+        >>> assert np.all(view == atleast_3channels(gray))
+        >>> assert atleast_3channels(gray).flags.writeable
     """
     ndims = len(arr.shape)
     if ndims == 2:
-        res = np.tile(arr[:, :, None], 3)
+        res = _expand_gray(arr[:, :, None], readonly and not copy)
         return res
     elif ndims == 3:
         h, w, c = arr.shape
         if c == 1:
-            res = np.tile(arr, 3)
+            res = _expand_gray(arr, readonly and not copy)
         elif c in [3, 4]:
             res = arr.copy() if copy else arr
         else:
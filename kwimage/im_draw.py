@@ -2,6 +2,7 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 import itertools as it
 import numpy as np
+import ubelt as ub
 import cv2
 
 
@@ -443,7 +444,7 @@ def _broadcast_colors(color, num, img, colorspace):
 
 
 def make_heatmask(probs, cmap='plasma', with_alpha=1.0, space='rgb',
-                  dsize=None):
+                  dsize=None, impl='numpy'):
     """
     Colorizes a single-channel intensity mask (with an alpha channel)
 
@@ -454,6 +455,8 @@ def make_heatmask(probs, cmap='plasma', with_alpha=1.0, space='rgb',
             by this number.
         space (str): output colorspace
         dsize (tuple): if not None, then output is resized to W,H=dsize
+        impl (str, default='numpy'): backend for the colormap lookup. Can be
+            numpy or numba.
 
     SeeAlso:
         kwimage.overlay_alpha_images
@@ -462,10 +465,24 @@ def make_heatmask(probs, cmap='plasma', with_alpha=1.0, space='rgb',
         >>> # xdoc: +REQUIRES(module:matplotlib)
         >>> probs = np.tile(np.linspace(0, 1, 10), (10, 1))
         >>> heatmask = make_heatmask(probs, with_alpha=0.8, dsize=(100, 100))
+        >>> # Colors match the matplotlib colormap
+        >>> import matplotlib as mpl
+        >>> cmap_ = mpl.cm.get_cmap('plasma')
+        >>> heatmask = make_heatmask(probs, with_alpha=0.8)
+        >>> assert np.all(heatmask[..., 0:3] == cmap_(probs)[..., 0:3].astype(np.float32))
+        >>> assert np.allclose(heatmask[..., 3], probs * 0.8)
         >>> # xdoc: +REQUIRES(--show)
         >>> import kwplot
         >>> kwplot.imshow(heatmask, fnum=1, doclf=True, colorspace='rgb')
         >>> kwplot.show_if_requested()
+
+    Example:
+        >>> # xdoc: +REQUIRES(module:matplotlib)
+        >>> # xdoc: +REQUIRES(module:numba)
+        >>> probs = np.random.RandomState(0).rand(32, 32).astype(np.float32)
+        >>> mask1 = make_heatmask(probs, with_alpha=0.5, impl='numpy')
+        >>> mask2 = make_heatmask(probs, with_alpha=0.5, impl='numba')
+        >>> assert np.all(mask1 == mask2)
     """
     import kwimage
     import matplotlib as mpl
@@ -473,10 +490,26 @@ def make_heatmask(probs, cmap='plasma', with_alpha=1.0, space='rgb',
     assert len(probs.shape) == 2
     cmap_ = mpl.cm.get_cmap(cmap)
     probs = kwimage.ensure_float01(probs)
-    heatmask = cmap_(probs).astype(np.float32)
-    heatmask = kwimage.convert_colorspace(heatmask, 'rgba', space, implicit=True)
-    if with_alpha is not False and with_alpha is not None:
-        heatmask[:, :, 3] = (probs * with_alpha)  # assign probs to alpha channel
+    # Index a float32 copy of the colormap table directly. This bins values
+    # the same way matplotlib does for floats, but skips its float64 output.
+    # The colorspace conversion is per-pixel, so it is applied to the table.
+    lut = cmap_(np.arange(cmap_.N)).astype(np.float32)
+    lut = kwimage.convert_colorspace(lut[:, None, :], 'rgba', space,
+                                     implicit=True)[:, 0, :]
+    use_alpha = with_alpha is not False and with_alpha is not None
+    if impl == 'numba':
+        heatmask = np.empty(probs.shape + lut.shape[-1:], dtype=np.float32)
+        kernel = _numba_heatmask_kernel()
+        alpha = probs.dtype.type(with_alpha if use_alpha else 0)
+        kernel(probs, lut, alpha, use_alpha, heatmask)
+    elif impl == 'numpy':
+        idx = np.multiply(probs, cmap_.N).astype(np.intp)
+        np.clip(idx, 0, cmap_.N - 1, out=idx)
+        heatmask = lut[idx]
+        if use_alpha:
+            heatmask[:, :, 3] = (probs * with_alpha)  # assign probs to alpha channel
+    else:
+        raise ValueError('unknown impl={}'.format(impl))
     if dsize is not None:
         import cv2
         heatmask = cv2.resize(
@@ -485,6 +518,34 @@ def make_heatmask(probs, cmap='plasma', with_alpha=1.0, space='rgb',
     return heatmask
 
 
+@ub.memoize
+def _numba_heatmask_kernel():
+    """
+    Lazily compiles a kernel that does the colormap lookup and writes the
+    alpha channel of :func:`make_heatmask` in a single pass over the pixels.
+    """
+    import numba
+
+    @numba.njit(parallel=True, cache=True)
+    def _kernel(probs, lut, alpha, use_alpha, out):
+        h, w = probs.shape
+        n = lut.shape[0]
+        nchan = lut.shape[1]
+        for r in numba.prange(h):
+            for c in range(w):
+                v = probs[r, c]
+                i = int(v * n)
+                if i < 0:
+                    i = 0
+                elif i > n - 1:
+                    i = n - 1
+                for k in range(nchan):
+                    out[r, c, k] = lut[i, k]
+                if use_alpha:
+                    out[r, c, 3] = v * alpha
+    return _kernel
+
+
 def make_orimask(radians, mag=None, alpha=1.0):
     """
     Makes a colormap in HSV space where the orientation changes color and mag
@@ -597,22 +658,22 @@ def make_vector_field(dx, dy, stride=0.02, thresh=0.0, scale=1.0, alpha=1.0,
     width = dx.shape[1]
     height = dy.shape[0]
 
-    x_grid = np.arange(0, width, 1)
-    y_grid = np.arange(0, height, 1)
-    # Vector locations and directions
-    X, Y = np.meshgrid(x_grid, y_grid)
-    U, V = dx, dy
-
-    XYUV = [X, Y, U, V]
-
     if isinstance(stride, float):
         if stride < 0 or stride > 1:
             raise ValueError('Floating point strides must be between 0 and 1')
         stride = int(np.ceil(stride * min(width, height)))
 
-    # stride the points
-    if stride is not None and stride > 1:
-        XYUV = [a[::stride, ::stride] for a in XYUV]
+    if stride is None or stride < 1:
+        stride = 1
+
+    # Vector locations and directions. Only the strided points are used, so
+    # only build the coordinate grid for those.
+    x_grid = np.arange(0, width, stride)
+    y_grid = np.arange(0, height, stride)
+    X, Y = np.meshgrid(x_grid, y_grid)
+    U, V = dx[::stride, ::stride], dy[::stride, ::stride]
+
+    XYUV = [X, Y, U, V]
 
     # flatten the points
     XYUV = [a.ravel() for a in XYUV]
@@ -705,22 +766,22 @@ def draw_vector_field(image, dx, dy, stride=0.02, thresh=0.0, scale=1.0,
 
     height, width = dx.shape[0:2]
 
-    x_grid = np.arange(0, width, 1)
-    y_grid = np.arange(0, height, 1)
-    # Vector locations and directions
-    X, Y = np.meshgrid(x_grid, y_grid)
-    U, V = dx, dy
-
-    XYUV = [X, Y, U, V]
-
     if isinstance(stride, float):
         if stride < 0 or stride > 1:
             raise ValueError('Floating point strides must be between 0 and 1')
         stride = int(np.ceil(stride * min(width, height)))
 
-    # stride the points
-    if stride is not None and stride > 1:
-        XYUV = [a[::stride, ::stride] for a in XYUV]
+    if stride is None or stride < 1:
+        stride = 1
+
+    # Vector locations and directions. Only the strided points are used, so
+    # only build the coordinate grid for those.
+    x_grid = np.arange(0, width, stride)
+    y_grid = np.arange(0, height, stride)
+    X, Y = np.meshgrid(x_grid, y_grid)
+    U, V = dx[::stride, ::stride], dy[::stride, ::stride]
+
+    XYUV = [X, Y, U, V]
 
     # flatten the points
     XYUV = [a.ravel() for a in XYUV]
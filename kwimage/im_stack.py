@@ -217,8 +217,10 @@ def _stack_two_images(img1, img2, axis=0, resize=None, interpolation=None,
 
     def _blend(part1, part2, alpha):
         """ blending based on an alpha mask """
-        part1, alpha = im_core.make_channels_comparable(part1, alpha)
-        part2, alpha = im_core.make_channels_comparable(part2, alpha)
+        part1, alpha = im_core.make_channels_comparable(part1, alpha,
+                                                        readonly=True)
+        part2, alpha = im_core.make_channels_comparable(part2, alpha,
+                                                        readonly=True)
         partB = (part1 * (1.0 - alpha)) + (part2 * (alpha))
         return partB
 
@@ -71,7 +71,7 @@ class ObjectList(Spatial):
     corresponds to a different object.
     """
 
-    # __slots__ = ('data', 'meta',)
+    __slots__ = ('data', 'meta',)
 
     def __init__(self, data, meta=None):
         if meta is None:
@@ -101,25 +101,27 @@ class ObjectList(Spatial):
         return self.data[index]
 
     def __iter__(self):
-        for index in range(len(self)):
-            yield self[index]
+        return iter(self.data)
 
     def translate(self, offset, output_dims=None, inplace=False):
+        data = self.data
         newdata = [None if item is None else
                    item.translate(offset, output_dims=output_dims,
                                   inplace=inplace)
-                   for item in self.data]
+                   for item in data]
         return self.__class__(newdata, self.meta)
 
     def scale(self, factor, output_dims=None, inplace=False):
+        data = self.data
         newdata = [None if item is None else
                    item.scale(factor, output_dims=output_dims, inplace=inplace)
-                   for item in self.data]
+                   for item in data]
         return self.__class__(newdata, self.meta)
 
     def warp(self, transform, input_dims=None, output_dims=None, inplace=False):
+        data = self.data
         if inplace:
-            for item in self.data:
+            for item in data:
                 if item is not None:
                     item.warp(transform, input_dims=input_dims,
                               output_dims=output_dims, inplace=inplace)
@@ -128,11 +130,12 @@ class ObjectList(Spatial):
             newdata = [None if item is None else
                        item.warp(transform, input_dims=input_dims,
                                  output_dims=output_dims, inplace=inplace)
-                       for item in self.data]
+                       for item in data]
             return self.__class__(newdata, self.meta)
 
     def apply(self, func):
-        newdata = [None if item is None else func(item) for item in self.data]
+        data = self.data
+        newdata = [None if item is None else func(item) for item in data]
         return self.__class__(newdata, self.meta)
 
     def to_coco(self, style='orig'):
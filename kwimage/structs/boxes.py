@@ -60,7 +60,6 @@ import warnings
 import skimage
 import kwarray
 import six
-from distutils.version import LooseVersion
 from . import _generic  # NOQA
 
 try:
@@ -70,6 +69,8 @@ except Exception:
     _TORCH_HAS_EMPTY_SHAPE = None
     _TORCH_HAS_BOOL_COMP = None
 else:
+    # Only pay for the distutils import if torch is available
+    from distutils.version import LooseVersion
     _TORCH_HAS_EMPTY_SHAPE = LooseVersion(torch.__version__) >= LooseVersion('1.0.0')
     _TORCH_HAS_BOOL_COMP = LooseVersion(torch.__version__) >= LooseVersion('1.2.0')
 
@@ -1060,6 +1061,22 @@ class _BoxTransformMixins(object):
             sx = factor[..., 0]
             sy = factor[..., 1]
 
+        if not inplace and (about is None or (
+                isinstance(about, six.string_types) and about == 'origin')):
+            if isinstance(self.data, np.ndarray) and self.data.size > 0:
+                if np.ndim(sx) == 0 and np.ndim(sy) == 0:
+                    # Fast path: fuse the float copy and the scale into one
+                    # ufunc call. (Inplace, the per-column updates are faster)
+                    if self.format in [BoxFormat.XYWH, BoxFormat.CXYWH, BoxFormat.TLBR]:
+                        factor_vec = np.array([sx, sy, sx, sy])
+                    elif self.format in [BoxFormat.XXYY]:
+                        factor_vec = np.array([sx, sx, sy, sy])
+                    else:
+                        raise NotImplementedError('Cannot scale: {}'.format(self.format))
+                    new_data = np.multiply(self.data, factor_vec,
+                                           dtype=np.float64)
+                    return Boxes(new_data, self.format)
+
         if inplace:
             new = self
             new_data = self.data
@@ -1168,6 +1185,21 @@ class _BoxTransformMixins(object):
             tx = amount[..., 0]
             ty = amount[..., 1]
 
+        if not inplace and isinstance(self.data, np.ndarray) and self.data.size > 0:
+            if np.ndim(tx) == 0 and np.ndim(ty) == 0:
+                # Fast path: fuse the float copy and the shift into one
+                # ufunc call. (Inplace, the per-column updates are faster)
+                if self.format in [BoxFormat.XYWH, BoxFormat.CXYWH]:
+                    amount_vec = np.array([tx, ty, 0, 0])
+                elif self.format in [BoxFormat.TLBR]:
+                    amount_vec = np.array([tx, ty, tx, ty])
+                elif self.format in [BoxFormat.XXYY]:
+                    amount_vec = np.array([tx, tx, ty, ty])
+                else:
+                    raise NotImplementedError('Cannot translate: {}'.format(self.format))
+                new_data = np.add(self.data, amount_vec, dtype=np.float64)
+                return Boxes(new_data, self.format)
+
         kwarray.ArrayAPI.impl(self.data)
 
         if inplace:
@@ -1757,7 +1789,14 @@ class Boxes(_BoxConversionMixins, _BoxPropertyMixins, _BoxTransformMixins,
         if axis != 0:
             raise ValueError('can only concatenate along axis=0')
         format = boxes[0].format
-        datas = [_view(b.toformat(format).data, -1, 4) for b in boxes]
+        datas = []
+        for b in boxes:
+            # Only convert (and copy) boxes that are not already in this format
+            data = b.data if b.format == format else b.toformat(format).data
+            if data.ndim != 2:
+                # A single box may be stored as a flat array
+                data = _view(data, -1, 4)
+            datas.append(data)
         newdata = _cat(datas, axis=0)
         new = cls(newdata, format)
         return new
@@ -1842,10 +1881,8 @@ class Boxes(_BoxConversionMixins, _BoxPropertyMixins, _BoxTransformMixins,
         """
         If the backend is torch returns the data device, otherwise None
         """
-        try:
-            return self.data.device
-        except AttributeError:
-            return None
+        # numpy data has no device, look it up without raising
+        return getattr(self.data, 'device', None)
 
     def astype(self, dtype):
         """
@@ -1909,7 +1946,7 @@ class Boxes(_BoxConversionMixins, _BoxPropertyMixins, _BoxTransformMixins,
         """
         data = self.data
         if torch is not None and torch.is_tensor(data):
-            data = data.data.cpu().numpy()
+            data = data.detach().cpu().numpy()
         newself = self.__class__(data, self.format)
         return newself
 
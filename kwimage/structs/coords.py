@@ -7,7 +7,6 @@ import numpy as np
 import ubelt as ub
 import skimage
 import kwarray
-from distutils.version import LooseVersion
 from . import _generic
 
 try:
@@ -18,6 +17,8 @@ except Exception:
 
 try:
     import imgaug
+    # Only pay for the distutils import if imgaug is available
+    from distutils.version import LooseVersion
     _HAS_IMGAUG_FLIP_BUG = LooseVersion(imgaug.__version__) <= LooseVersion('0.2.9') and not hasattr(imgaug.augmenters.size, '_crop_and_pad_kpsoi')
     _HAS_IMGAUG_XY_ARRAY = LooseVersion(imgaug.__version__) >= LooseVersion('0.2.9')
 except ImportError:
@@ -247,10 +248,8 @@ class Coords(_generic.Spatial, ub.NiceRepr):
         """
         If the backend is torch returns the data device, otherwise None
         """
-        try:
-            return self.data.device
-        except AttributeError:
-            return None
+        # numpy data has no device, look it up without raising
+        return getattr(self.data, 'device', None)
 
     # @ub.memoize_property
     @property
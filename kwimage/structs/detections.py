@@ -29,13 +29,14 @@ If you want to visualize boxes and scores you can do this:
     >>> plt.gca().set_ylim(0, 224)
 
 """
-from __future__ import absolute_import, division, print_function, unicode_literals
-import six
+import itertools as it
+import operator
+import threading
 import numpy as np
 import ubelt as ub
+import kwarray
 from kwimage.structs import boxes as _boxes
 from kwimage.structs import _generic
-from distutils.version import LooseVersion
 
 
 try:
@@ -49,6 +50,8 @@ except Exception:
     torch = None
     _TORCH_HAS_BOOL_COMP = False
 else:
+    # Only pay for the distutils import if torch is available
+    from distutils.version import LooseVersion
     _TORCH_HAS_BOOL_COMP = LooseVersion(torch.__version__) >= LooseVersion('1.2.0')
 
 
@@ -94,11 +97,9 @@ class _DetDrawMixin:
             keypoints.draw(color=color, radius=radius)
 
         if setlim:
-            x1, y1, x2, y2 = self.boxes.to_tlbr().components
-            xmax = x2.max()
-            xmin = x1.min()
-            ymax = y2.max()
-            ymin = y1.min()
+            tlbr = self.boxes.to_tlbr().numpy().data
+            xmin, ymin = tlbr[:, 0:2].min(axis=0)
+            xmax, ymax = tlbr[:, 2:4].max(axis=0)
             import matplotlib.pyplot as plt
             ax = plt.gca()
             ax.set_xlim(xmin, xmax)
@@ -153,8 +154,11 @@ class _DetDrawMixin:
 
         dtype_fixer = _generic._consistent_dtype_fixer(image)
 
-        segmentations = self.data.get('segmentations', None)
-        if sseg and segmentations is not None:
+        data = self.data
+        segmentations = data.get('segmentations', None) if sseg else None
+        keypoints = data.get('keypoints', None) if kpts else None
+
+        if segmentations is not None:
             if ssegkw is None:
                 ssegkw = {
                     'alpha': 0.4,
@@ -163,11 +167,10 @@ class _DetDrawMixin:
             image = segmentations.draw_on(image, **ssegkw)
 
         if boxes:
-            image = self.boxes.draw_on(image, color=color, alpha=alpha,
-                                       labels=labels)
+            image = data['boxes'].draw_on(image, color=color, alpha=alpha,
+                                          labels=labels)
 
-        keypoints = self.data.get('keypoints', None)
-        if kpts and keypoints is not None:
+        if keypoints is not None:
             # image = kwimage.ensure_float01(image)
             image = keypoints.draw_on(image, radius=radius, color=color)
             # kwimage.ensure_float01(image)
@@ -192,34 +195,85 @@ class _DetDrawMixin:
         """
         Either passes through user specified labels or chooses a sensible
         default
+
+        Example:
+            >>> import kwimage
+            >>> self = Detections(boxes=kwimage.Boxes.random(3))
+            >>> assert self._make_labels(True) is None
+            >>> assert self._make_labels(False) is False
+            >>> self.data['scores'] = np.array([.1, .2, .3])
+            >>> assert self._make_labels(True) == ['0.1000', '0.2000', '0.3000']
         """
-        if labels:
-            if labels is True:
-                parts = []
-                if self.data.get('class_idxs', None) is not None:
-                    parts.append('class')
-                # Choose sensible default
-                if self.data.get('scores', None) is not None:
-                    parts.append('score')
-                labels = '+'.join(parts)
-
-            if isinstance(labels, six.string_types):
-                if labels in ['class', 'class+score']:
-                    if self.classes:
-                        identifers = list(ub.take(self.classes, self.class_idxs))
-                    else:
-                        identifers = self.class_idxs
-                if labels in ['class']:
-                    labels = identifers
-                elif labels in ['score']:
-                    labels = ['{:.4f}'.format(score) for score in self.scores]
-                elif labels in ['class+score']:
-                    labels = ['{} @ {:.4f}'.format(cid, score)
-                              for cid, score in zip(identifers, self.scores)]
-                else:
-                    raise KeyError('unknown labels key {!r}'.format(labels))
+        if not labels:
+            return labels
+
+        if labels is True:
+            # Choose sensible default
+            data = self.data
+            has_class = data.get('class_idxs', None) is not None
+            has_score = data.get('scores', None) is not None
+            if has_class and has_score:
+                labels = 'class+score'
+            elif has_class:
+                labels = 'class'
+            elif has_score:
+                labels = 'score'
+            else:
+                return None
+
+        if isinstance(labels, str):
+            labels = self._format_labels(labels)
+        return labels
+
+    def _format_labels(self, key):
+        """
+        Builds the label strings for a label key.
+
+        Example:
+            >>> self = Detections.random(num=5, classes=['a', 'b'], rng=0)
+            >>> labels = self._make_labels('class+score')
+            >>> expected = ['{} @ {:.4f}'.format(self.classes[cx], score)
+            >>>             for cx, score in zip(self.class_idxs, self.scores)]
+            >>> assert labels == expected
+            >>> assert self._make_labels('score') == [
+            >>>     '{:.4f}'.format(score) for score in self.scores]
+            >>> # Inplace edits are reflected in the labels
+            >>> self.data['scores'][:] = 0
+            >>> self.data['class_idxs'][:] = 1
+            >>> assert self._make_labels('class+score') == ['b @ 0.0000'] * 5
+        """
+        scores = self.data.get('scores', None)
+        class_idxs = self.data.get('class_idxs', None)
+        classes = self.meta.get('classes', None)
+
+        if key in ['class', 'class+score']:
+            if classes:
+                classes_arr = self._classes_array(classes)
+                identifers = classes_arr[_asnumpy(class_idxs)].tolist()
+            else:
+                identifers = _tolist(class_idxs)
+        if key in ['class']:
+            labels = identifers
+        elif key in ['score']:
+            # Formatting python floats is much faster than numpy scalars
+            labels = ['%.4f' % score for score in _tolist(scores)]
+        elif key in ['class+score']:
+            labels = ['%s @ %.4f' % pair
+                      for pair in zip(identifers, _tolist(scores))]
+        else:
+            raise KeyError('unknown labels key {!r}'.format(key))
         return labels
 
+    def _classes_array(self, classes):
+        """
+        Returns the class names as an object array, so names can be looked up
+        by fancy indexing.
+        """
+        names = list(classes)
+        classes_arr = np.empty(len(names), dtype=object)
+        classes_arr[:] = names
+        return classes_arr
+
 
 class _DetAlgoMixin:
     """
@@ -227,7 +281,8 @@ class _DetAlgoMixin:
     """
 
     def non_max_supression(self, thresh=0.0, perclass=False, impl='auto',
-                           daq=False, device_id=None):
+                           daq=False, device_id=None, workers=0, top_k=None,
+                           iou_dtype=None, grid_impl='auto'):
         """
         Find high scoring minimally overlapping detections
 
@@ -238,15 +293,59 @@ class _DetAlgoMixin:
                 are returned). A value of 0 means that returned boxes will have
                 no overlap.
             perclass (bool): if True, works on a per-class basis
-            impl (str): nms implementation to use
+            impl (str): nms implementation to use. If 'grid', boxes are
+                bucketed spatially with `kwimage.grid_spatial_nms`, which
+                scales better for many dispersed boxes, but may differ
+                slightly from exact greedy nms. If 'fast', uses the
+                vectorized Fast-NMS approximation, which is more aggressive
+                than greedy nms but avoids the sequential suppression loop.
             daq (Bool | Dict): if False, uses reqgular nms, otherwise uses
                 divide and conquor algorithm. If `daq` is a Dict, then
                 it is used as the kwargs to `kwimage.daq_spatial_nms`
 
             device_id : try not to use. only used if impl is gpu
 
+            workers (int, default=0): if positive and perclass is True,
+                classes are handled by a pool of this many threads. If impl
+                is 'grid', the grid cells are handled by the pool instead.
+
+            top_k (int, default=None): if specified, only the top_k highest
+                scoring boxes are considered, which bounds the cost of nms
+                for detectors that emit many low scoring candidates.
+
+            iou_dtype (str, default=None): only used if impl is 'fast'. If
+                specified (e.g. 'float16') and the boxes are CUDA tensors,
+                the IoU matrix is computed in this reduced precision dtype.
+
+            grid_impl (str, default='auto'): only used if impl is 'grid'.
+                The nms implementation used within each grid cell.
+
         Returns:
             ndarray[int]: indices of boxes to keep
+
+        Example:
+            >>> import kwimage
+            >>> self = kwimage.Detections.random(100, rng=0)
+            >>> keep = self.non_max_supression(thresh=0.5, top_k=10)
+            >>> assert set(keep) <= set(self.argsort(top_k=10))
+            >>> full = self.take(self.argsort()[:10]).non_max_supression(0.5)
+            >>> assert len(keep) == len(full)
+            >>> # The grid impl forwards workers and the per-cell impl
+            >>> keep1 = self.non_max_supression(0.5, impl='grid')
+            >>> keep2 = self.non_max_supression(0.5, impl='grid', workers=2,
+            >>>                                 grid_impl='numpy')
+            >>> assert list(keep1) == list(keep2)
+
+        Example:
+            >>> # xdoctest: +REQUIRES(module:torch)
+            >>> import kwimage
+            >>> import torch
+            >>> if torch.cuda.is_available():
+            >>>     self = kwimage.Detections.random(100, rng=0).tensor('cuda')
+            >>>     keep1 = self.non_max_supression(0.5, impl='fast')
+            >>>     keep2 = self.non_max_supression(0.5, impl='fast',
+            >>>                                     iou_dtype='float16')
+            >>>     assert len(set(keep1) ^ set(keep2)) <= 2
         """
         import kwimage
         classes = self.class_idxs if perclass else None
@@ -254,10 +353,22 @@ class _DetAlgoMixin:
         if len(self) <= 0:
             return []
 
-        tlbr = self.boxes.to_tlbr().data
+        # The nms impls never write to their inputs, so tlbr boxes can be
+        # passed through without a copy.
+        tlbr = self.boxes.to_tlbr(copy=False).data
         scores = self.data.get('scores', None)
         if scores is None:
             scores = np.ones(len(self), dtype=np.float32)
+
+        topx = None
+        if top_k is not None and top_k < len(self):
+            # Only gather what nms needs instead of taking every data key
+            topx = _argsort_top_k(scores, top_k)
+            tlbr = tlbr[topx]
+            scores = scores[topx]
+            if classes is not None:
+                classes = classes[topx]
+
         if daq:
             daqkw = {} if daq is True else daq.copy()
             daqkw['impl'] = daqkw.get('impl', impl)
@@ -265,18 +376,27 @@ class _DetAlgoMixin:
             daqkw['max_depth'] = daqkw.get('max_depth', 12)
             daqkw['thresh'] = daqkw.get('thresh', thresh)
             if 'diameter' not in daqkw:
-                if len(self.boxes) > 0:
-                    daqkw['diameter'] = max(self.boxes.width.max(),
-                                            self.boxes.height.max())
-                else:
-                    daqkw['diameter'] = 10  # hack
+                # One reduction over the widths and heights of the tlbr
+                # boxes we already have (empty inputs returned above).
+                wh = tlbr[:, 2:4] - tlbr[:, 0:2]
+                daqkw['diameter'] = float(wh.max())
 
             keep = kwimage.daq_spatial_nms(tlbr, scores, device_id=device_id,
                                            **daqkw)
+        elif impl == 'grid':
+            keep = kwimage.grid_spatial_nms(tlbr, scores, thresh=thresh,
+                                            classes=classes,
+                                            impl=grid_impl,
+                                            device_id=device_id,
+                                            workers=workers)
         else:
             keep = kwimage.non_max_supression(tlbr, scores, thresh=thresh,
                                               classes=classes, impl=impl,
-                                              device_id=device_id)
+                                              device_id=device_id,
+                                              workers=workers,
+                                              iou_dtype=iou_dtype)
+        if topx is not None:
+            keep = _asnumpy(topx)[np.asarray(keep, dtype=np.int64)]
         return keep
 
     def non_max_supress(self, thresh=0.0, perclass=False, impl='auto',
@@ -317,6 +437,18 @@ class _DetAlgoMixin:
             >>> kwplot.imshow(heatmap.draw_on(image))
             >>> kwplot.figure(fnum=1, pnum=(2, 1, 2))
             >>> kwplot.imshow(heatmap.draw_stacked())
+
+        Example:
+            >>> # Rasterized outputs are not overwritten by later calls
+            >>> import kwimage
+            >>> classes = ['background', 'a', 'b']
+            >>> dets1 = kwimage.Detections.random(5, classes=classes, rng=0).scale(32)
+            >>> dets2 = kwimage.Detections.random(5, classes=classes, rng=1).scale(32)
+            >>> heatmap1 = dets1.rasterize(bg_size=(10, 10), input_dims=(32, 32))
+            >>> before = {k: v.copy() for k, v in heatmap1.data.items()}
+            >>> heatmap2 = dets2.rasterize(bg_size=(10, 10), input_dims=(32, 32))
+            >>> for key, value in before.items():
+            >>>     assert np.all(heatmap1.data[key] == value)
         """
         import kwarray
         import skimage
@@ -351,11 +483,10 @@ class _DetAlgoMixin:
                 class_idx, num_classes=len(classes), dim=0)
 
             if soften > 0:
-                k = 31
-                sigma = 0.3 * ((k - 1) * 0.5 - 1) + 0.8  # opencv formula
                 data = impl.contiguous(class_probs.T)
                 import cv2
-                cv2.GaussianBlur(data, (k, k), sigma, dst=data)
+                kernel = _gaussian_kernel1d(31)
+                cv2.sepFilter2D(data, -1, kernel, kernel, dst=data)
                 class_probs = impl.contiguous(data.T)
 
             if soften > 1:
@@ -390,6 +521,12 @@ class _DetAlgoMixin:
                 kw_heat['keypoints'] = impl.view(fcn_target['kpts'], (2, K,) + dims)[[1, 0]]
                 kw_heat['kpts_ignore'] = fcn_target['kpts_ignore']
 
+        # These targets were copied when reordering their channels, so their
+        # buffers can be reused by the next call.
+        for key in ['size', 'dxdy', 'kpts']:
+            if key in fcn_target:
+                _release(fcn_target[key])
+
         self = kwimage.Heatmap(**kw_heat)
         # print('self.data: ' + ub.repr2(ub.map_vals(lambda x: x.shape, self.data), nl=1))
         return self
@@ -530,12 +667,10 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
                     'Unknown kwargs: {}'.format(sorted(kwargs.keys())))
 
             if checks:
-                import kwarray
                 # Check to make sure all types in `data` are compatible
-                ndarrays = []
-                tensors = []
+                has_numpy = False
+                has_torch = False
                 other = []
-                objlist = []
 
                 ### Make it easier to specify keypoints and segmentations
                 if 'segmentations' in data:
@@ -544,25 +679,21 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
                         data['segmentations'])
 
                 for k, v in data.items():
-                    if _generic._isinstance2(v, _generic.ObjectList):
-                        objlist.append(v)
-                    elif _generic._isinstance2(v, _boxes.Boxes):
-                        if v.is_numpy():
-                            ndarrays.append(k)
-                        else:
-                            tensors.append(k)
-                    elif isinstance(v, np.ndarray):
-                        ndarrays.append(k)
-                    elif torch is not None and isinstance(v, torch.Tensor):
-                        tensors.append(k)
-                    else:
+                    kind = _array_kind(v)
+                    if kind == 'boxes':
+                        kind = 'numpy' if v.is_numpy() else 'torch'
+                    if kind == 'numpy':
+                        has_numpy = True
+                    elif kind == 'torch':
+                        has_torch = True
+                    elif kind == 'other':
                         other.append(k)
+                    if has_numpy and has_torch:
+                        raise TypeError(
+                            'Detections can hold numpy.ndarrays or '
+                            'torch.Tensors, but not both')
 
-                if bool(ndarrays) and bool(tensors):
-                    raise TypeError(
-                        'Detections can hold numpy.ndarrays or torch.Tensors, '
-                        'but not both')
-                if tensors:
+                if has_torch:
                     impl = kwarray.ArrayAPI.coerce('tensor')
                 else:
                     impl = kwarray.ArrayAPI.coerce('numpy')
@@ -586,12 +717,32 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
     def __len__(self):
         return self.num_boxes()
 
-    def copy(self):
+    def copy(self, deep=False):
         """
-        Returns a deep copy of this Detections object
+        Returns a copy of this Detections object
+
+        Args:
+            deep (bool, default=False): if False, only the data and meta
+                dictionaries are copied and the underlying arrays are shared.
+                Use deep=True if you intend to modify arrays inplace.
+
+        Example:
+            >>> self = Detections.random(10)
+            >>> shallow = self.copy()
+            >>> assert shallow.data is not self.data
+            >>> assert shallow.data['scores'] is self.data['scores']
+            >>> deep = self.copy(deep=True)
+            >>> assert deep.data['scores'] is not self.data['scores']
+            >>> assert np.all(deep.data['scores'] == self.data['scores'])
+            >>> assert deep.data['boxes'].data is not self.data['boxes'].data
+            >>> assert deep.meta['classes'] is not self.meta['classes']
         """
-        import copy
-        return copy.deepcopy(self)
+        if deep:
+            import copy
+            newdata = {key: _deepcopy_value(val)
+                       for key, val in self.data.items()}
+            return self.__class__(newdata, copy.deepcopy(self.meta))
+        return self.__class__(self.data.copy(), self.meta.copy())
 
     @classmethod
     def coerce(cls, data=None, **kwargs):
@@ -619,7 +770,7 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
 
         cnames = kwargs.get('cnames', kwargs.get('class_names', kwargs.get('catnames', None)))
         if cnames is not None:
-            if len(cnames) and isinstance(ub.peek(cnames), six.string_types):
+            if len(cnames) and isinstance(ub.peek(cnames), str):
                 if 'classes' not in data:
                     data['classes'] = sorted(set(cnames))
                 if 'class_idxs' not in data:
@@ -743,23 +894,32 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
         if classes is None:
             classes = list(ub.oset([cat['name'] for cat in cats]))
 
+        cid_to_cat = {c['id']: c for c in cats}  # Hack
+        cname_to_idx = {cname: cx for cx, cname in enumerate(classes)}
         if cnames is None:
-            cids = [ann['category_id'] for ann in anns]
-            cid_to_cat = {c['id']: c for c in cats}  # Hack
-            cnames = [None if cid is None else cid_to_cat[cid]['name']
-                      for cid in cids]
+            # Map category ids directly to class indices
+            keys = list(map(operator.itemgetter('category_id'), anns))
+            key_to_idx = {cid: cname_to_idx[cat['name']]
+                          for cid, cat in cid_to_cat.items()
+                          if cat['name'] in cname_to_idx}
+        else:
+            keys = cnames
+            key_to_idx = cname_to_idx
 
-        xywh = np.array([ann['bbox'] for ann in anns], dtype=np.float32)
+        flat_xywh = it.chain.from_iterable(map(operator.itemgetter('bbox'), anns))
+        xywh = np.fromiter(flat_xywh, dtype=np.float32,
+                           count=len(anns) * 4).reshape(-1, 4)
         boxes = kwimage.Boxes(xywh, 'xywh')
-        try:
-            class_idxs = [classes.index(cname) for cname in cnames]
-        except (KeyError, ValueError):
-            class_idxs = [None if cname is None else classes.index(cname)
-                          for cname in cnames]
+        if None in keys:
+            class_idxs = np.array([None if key is None else key_to_idx[key]
+                                   for key in keys])
+        else:
+            class_idxs = np.fromiter(map(key_to_idx.__getitem__, keys),
+                                     dtype=np.int64, count=len(keys))
 
         dets = Detections(
             boxes=boxes,
-            class_idxs=np.array(class_idxs),
+            class_idxs=class_idxs,
             classes=classes,
         )
 
@@ -784,7 +944,13 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
 
         if True:
             name_to_cat = {c['name']: c for c in cats}
+            if kp_classes is not None:
+                kp_name_to_idx = {n: kpcx for kpcx, n in enumerate(kp_classes)}
+            cid_to_kpcidxs = {}
             def _lookup_kp_class_idxs(cid):
+                if cid in cid_to_kpcidxs:
+                    return cid_to_kpcidxs[cid]
+                orig_cid = cid
                 kpnames = None
                 while kpnames is None:
                     cat = cid_to_cat[cid]
@@ -795,30 +961,40 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
                         cid = name_to_cat[cat['supercategory']]['id']
                     else:
                         raise KeyError(cid)
-                kpcidxs = [kp_classes.index(n) for n in kpnames]
+                kpcidxs = [kp_name_to_idx[n] for n in kpnames]
+                cid_to_kpcidxs[orig_cid] = kpcidxs
                 return kpcidxs
-            kpts = []
-            for ann in anns:
+            kpts = [None] * len(anns)
+            oldstyle_idxs = []
+            for idx, ann in enumerate(anns):
                 k = ann.get('keypoints', None)
                 if k is None:
-                    kpts.append(k)
-                elif len(k) == 0:
-                    kpcidxs = []
-                else:
-                    kpcidxs = None
+                    continue
+                if len(k) and isinstance(ub.peek(k), dict):
                     # TODO: correctly handle newstyle keypoints
-                    if dset is not None:
-                        pass
+                    kpts[idx] = kwimage.Points.from_coco(
+                        k, class_idxs=None, classes=kp_classes)
+                else:
+                    oldstyle_idxs.append(idx)
+
+            if oldstyle_idxs:
+                # Parse all flat [x, y, v, ...] lists into a single array and
+                # give each annotation a view into it.
+                flat_kpts = [anns[idx]['keypoints'] for idx in oldstyle_idxs]
+                num_vals = [len(k) for k in flat_kpts]
+                flat = np.fromiter(it.chain.from_iterable(flat_kpts),
+                                   dtype=np.float64, count=sum(num_vals))
+                offsets = np.cumsum(num_vals[:-1], dtype=np.int64) // 3
+                parts = np.split(flat.reshape(-1, 3), offsets)
+                for idx, kp in zip(oldstyle_idxs, parts):
                     kpcidxs = None
-                    if not (isinstance(k, list) and len(k) and isinstance(ub.peek(k), dict)):
-                        # oldstyle
-                        if kp_classes is not None:
-                            # These are only needed for old-style coco
-                            kpcidxs = _lookup_kp_class_idxs(ann['category_id'])
-
-                    pts = kwimage.Points.from_coco(
-                        k, class_idxs=kpcidxs, classes=kp_classes)
-                    kpts.append(pts)
+                    if len(kp) == 0:
+                        kpcidxs = []
+                    elif kp_classes is not None:
+                        # These are only needed for old-style coco
+                        kpcidxs = _lookup_kp_class_idxs(anns[idx]['category_id'])
+                    kpts[idx] = kwimage.Points.from_coco(
+                        kp, class_idxs=kpcidxs, classes=kp_classes)
             dets.data['keypoints'] = kwimage.PointsList(kpts)
 
             if kp_classes is not None:
@@ -874,7 +1050,8 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
         if 'class_idxs' in self.data:
             if 'classes' in self.meta:
                 classes = self.meta['classes']
-                catnames = [classes[cidx] for cidx in self.class_idxs]
+                classes_arr = self._classes_array(classes)
+                catnames = classes_arr[_asnumpy(self.class_idxs)].tolist()
                 if cname_to_cat is not None:
                     pass
                 if dset is not None:
@@ -912,7 +1089,7 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
 
         keys = list(to_collate.keys())
         for item_vals in zip(*to_collate.values()):
-            ann = ub.dzip(keys, item_vals)
+            ann = dict(zip(keys, item_vals))
             yield ann
 
     # --- Data Properties ---
@@ -967,6 +1144,23 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
         new.data['boxes'] = new.data['boxes'].warp(transform,
                                                    input_dims=input_dims,
                                                    inplace=inplace)
+        matrix = transform
+        if not isinstance(matrix, np.ndarray):
+            matrix = getattr(transform, 'params', None)
+        if isinstance(matrix, np.ndarray):
+            # Warp the coordinates of all keypoints and polygons at once
+            keys = [key for key in ['keypoints', 'segmentations']
+                    if key in new.data]
+            coords = []
+            try:
+                warped = [_batch_warp_structure(new.data[key], inplace, coords)
+                          for key in keys]
+            except _CannotBatchWarp:
+                pass
+            else:
+                _warp_coords_list(matrix, coords)
+                new.data.update(zip(keys, warped))
+                return new
         if 'keypoints' in new.data:
             new.data['keypoints'] = new.data['keypoints'].warp(
                 transform, input_dims=input_dims, output_dims=output_dims,
@@ -991,6 +1185,9 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
             >>> assert new != self
         """
         new = self if inplace else self.__class__(self.data.copy(), self.meta)
+        if output_dims is None and _is_noop_param(factor, 1):
+            # Nothing moves, a non-inplace result shares arrays with self
+            return new
         new.data['boxes'] = new.data['boxes'].scale(factor, inplace=inplace)
         if 'keypoints' in new.data:
             new.data['keypoints'] = new.data['keypoints'].scale(
@@ -1009,8 +1206,19 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
             >>> import skimage
             >>> self = Detections.random(2)
             >>> new = self.translate(10)
+
+        Example:
+            >>> # A zero offset returns a shallow copy without moving anything
+            >>> self = Detections.random(2, segmentations=True)
+            >>> new = self.translate((0, 0))
+            >>> assert new is not self
+            >>> assert new.data['boxes'] is self.data['boxes']
+            >>> assert self.scale(1.0).data['boxes'] is self.data['boxes']
         """
         new = self if inplace else self.__class__(self.data.copy(), self.meta)
+        if output_dims is None and _is_noop_param(offset, 0):
+            # Nothing moves, a non-inplace result shares arrays with self
+            return new
         new.data['boxes'] = new.data['boxes'].translate(offset, inplace=inplace)
         if 'keypoints' in new.data:
             new.data['keypoints'] = new.data['keypoints'].translate(
@@ -1024,7 +1232,8 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
     def concatenate(cls, dets):
         """
         Args:
-            boxes (Sequence[Detections]): list of detections to concatenate
+            dets (Sequence[Detections]): list of detections to concatenate.
+                If there is only one, the result shares its arrays.
 
         Returns:
             Detections: stacked detections
@@ -1041,46 +1250,63 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
             >>> dets = [self, other]
             >>> new = Detections.concatenate(dets)
             >>> assert new.num_boxes() == 5
+
+            >>> # A single item is returned without copying its arrays
+            >>> new = Detections.concatenate([self])
+            >>> assert new is not self
+            >>> assert new.data['scores'] is self.data['scores']
         """
         if len(dets) == 0:
             raise ValueError('need at least one detection to concatenate')
-        newdata = {}
         first = dets[0]
-        for key in first.data.keys():
-            if first.data[key] is None:
+        if len(dets) == 1:
+            # Nothing to stack, the result shares the underlying arrays
+            return cls(first.data.copy(), first.meta)
+        newdata = {}
+        for key, value in first.data.items():
+            if value is None:
                 newdata[key] = None
             else:
+                # Use class concatenate if it exists, otherwise use numpy/torch
+                cat = getattr(type(value), 'concatenate', _boxes._cat)
                 try:
                     tocat = [d.data[key] for d in dets]
-                    try:
-                        # Use class concatenate if it exists,
-                        cat = tocat[0].__class__.concatenate
-                    except AttributeError:
-                        # otherwise use numpy/torch
-                        cat = _boxes._cat
                     newdata[key] = cat(tocat, axis=0)
                 except Exception:
                     msg = ('Error when trying to concat {}'.format(key))
                     print(msg)
                     raise
 
-        newmeta = dets[0].meta
+        newmeta = first.meta
         new = cls(newdata, newmeta)
         return new
 
-    def argsort(self, reverse=True):
+    def argsort(self, reverse=True, top_k=None):
         """
         Sorts detection indices by descending (or ascending) scores
 
+        Args:
+            reverse (bool, default=True): if True sorts by descending score
+            top_k (int, default=None): if specified only the first top_k
+                sorted indices are computed, which avoids a full sort.
+
         Returns:
             ndarray[int]: sorted indices
+
+        Example:
+            >>> self = Detections.random(20, rng=0)
+            >>> assert np.all(self.argsort(top_k=5) == self.argsort()[:5])
+            >>> assert np.all(self.argsort(reverse=False, top_k=5) ==
+            >>>               self.argsort(reverse=False)[:5])
         """
-        sortx = self.scores.argsort()
+        scores = self.scores
+        if top_k is not None:
+            return _argsort_top_k(scores, top_k, reverse=reverse)
+        if torch is not None and torch.is_tensor(scores):
+            return torch.argsort(scores, descending=reverse)
+        sortx = scores.argsort()
         if reverse:
-            if torch is not None and torch.is_tensor(sortx):
-                sortx = torch.flip(sortx, dims=(0,))
-            else:
-                sortx = sortx[::-1]
+            sortx = sortx[::-1]
         return sortx
 
     def sort(self, reverse=True):
@@ -1124,24 +1350,25 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
 
         if self.is_tensor():
             if isinstance(flags, np.ndarray):
-                if flags.dtype.kind == 'b':
-                    flags = flags.astype(np.uint8)
-            if isinstance(flags, torch.Tensor):
-                if _TORCH_HAS_BOOL_COMP:
-                    if flags.dtype != torch.bool:
-                        flags = flags.bool()
-                else:
-                    if flags.dtype != torch.uint8:
-                        flags = flags.byte()
-                if flags.device != flags.device:
-                    flags = flags.to(self.device)
+                # torch cannot wrap arrays with negative strides
+                flags = np.ascontiguousarray(flags)
+            # as_tensor only copies when the dtype or device has to change
+            flag_dtype = torch.bool if _TORCH_HAS_BOOL_COMP else torch.uint8
+            flags = torch.as_tensor(flags, dtype=flag_dtype,
+                                    device=self.device)
+        newdata = {}
+        for key, val in self.data.items():
+            # Mask raw arrays directly, the generic compress is only needed
+            # for structures and other array-likes.
+            if val is None:
+                newval = None
+            elif type(val) is np.ndarray:
+                newval = val.compress(flags, axis=axis)
+            elif torch is not None and torch.is_tensor(val) and axis == 0:
+                newval = val[flags]
             else:
-                if _TORCH_HAS_BOOL_COMP:
-                    flags = torch.BoolTensor(flags).to(self.device)
-                else:
-                    flags = torch.ByteTensor(flags).to(self.device)
-        newdata = {k: _generic._safe_compress(v, flags, axis)
-                   for k, v in self.data.items()}
+                newval = _generic._safe_compress(val, flags, axis)
+            newdata[key] = newval
         return self.__class__(newdata, self.meta)
 
     def take(self, indices, axis=0):
@@ -1164,9 +1391,25 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
             >>> assert len(subset) == 4
         """
         if self.is_tensor():
-            indices = torch.LongTensor(indices).to(self.device)
-        newdata = {k: _generic._safe_take(v, indices, axis)
-                   for k, v in self.data.items()}
+            if not torch.is_tensor(indices):
+                # torch cannot wrap arrays with negative strides
+                indices = torch.from_numpy(
+                    np.ascontiguousarray(indices, dtype=np.int64))
+            # One conversion, which is a no-op if dtype and device match
+            indices = indices.to(self.device, torch.long, non_blocking=True)
+        newdata = {}
+        for key, val in self.data.items():
+            # Index raw arrays directly, the generic take is only needed for
+            # structures and other array-likes.
+            if val is None:
+                newval = None
+            elif type(val) is np.ndarray:
+                newval = val.take(indices, axis=axis)
+            elif torch is not None and torch.is_tensor(val) and axis is not None:
+                newval = torch.index_select(val, axis, indices)
+            else:
+                newval = _generic._safe_take(val, indices, axis)
+            newdata[key] = newval
         return self.__class__(newdata, self.meta)
 
     def __getitem__(self, index):
@@ -1182,13 +1425,15 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
             >>> indices = [2, 3, 5, 7]
             >>> flags = kwarray.boolmask(indices, len(dets))
             >>> assert dets[flags].data == dets[indices].data
+            >>> assert len(dets[0:0]) == 0
+            >>> assert len(dets[::3]) == 4
         """
         if isinstance(index, slice):
-            index = list(range(*index.indices(len(self))))
-        if ub.iterable(index):
-            import kwarray
-            impl = kwarray.ArrayAPI.coerce('numpy')
-            indices = impl.asarray(index)
+            indices = np.arange(*index.indices(len(self)))
+        elif torch is not None and torch.is_tensor(index):
+            indices = _asnumpy(index)
+        elif ub.iterable(index):
+            indices = np.asarray(index)
         else:
             indices = np.array([index])
         if indices.dtype.kind == 'b':
@@ -1224,17 +1469,30 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
             >>> self.numpy().numpy()
         """
         newdata = {}
+        pending = []
         for key, val in self.data.items():
             if val is None:
                 newval = val
             else:
                 if torch is not None and torch.is_tensor(val):
-                    newval = val.data.cpu().numpy()
+                    if val.is_cuda:
+                        # Queue the device-to-host copies so we only need to
+                        # wait for the device once instead of once per key.
+                        newval = val.detach().to('cpu', non_blocking=True)
+                        pending.append((key, val.device))
+                    else:
+                        # CPU tensors share their memory with the ndarray
+                        newval = val.detach().numpy()
                 elif hasattr(val, 'numpy'):
                     newval = val.numpy()
                 else:
                     newval = val
             newdata[key] = newval
+        if pending:
+            for device in {device for _, device in pending}:
+                torch.cuda.synchronize(device)
+            for key, _ in pending:
+                newdata[key] = newdata[key].numpy()
         newself = self.__class__(newdata, self.meta)
         return newself
 
@@ -1283,7 +1541,9 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
                 else:
                     newval = torch.from_numpy(val)
                 if device is not ub.NoParam:
-                    newval = newval.to(device)
+                    # Host-to-device copies are ordered on the stream, so
+                    # there is no need to block on each one.
+                    newval = newval.to(device, non_blocking=True)
             newdata[key] = newval
         newself = self.__class__(newdata, self.meta)
         return newself
@@ -1370,7 +1630,7 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
                 sseg_list.append(sseg)
             self.data['segmentations'] = kwimage.SegmentationList.coerce(sseg_list)
 
-        if isinstance(keypoints, six.string_types):
+        if isinstance(keypoints, str):
             kp_classes = [1, 2, 3, 4]
             self.meta['kp_classes'] = kp_classes
             if keypoints == 'jagged':
@@ -1397,8 +1657,194 @@ class Detections(ub.NiceRepr, _DetAlgoMixin, _DetDrawMixin):
         return self
 
 
+class _CannotBatchWarp(Exception):
+    """
+    Raised when a structure must be warped with its own ``warp`` method
+    """
+
+
+def _batch_warp_structure(item, inplace, coords):
+    """
+    Builds the structure that ``item.warp(matrix, inplace=inplace)`` would
+    return, but defers warping. The Coords objects that need to be warped are
+    appended to ``coords`` so they can be warped with a single call to
+    :func:`_warp_coords_list`.
+
+    Raises:
+        _CannotBatchWarp: if the item contains masks, tensors, or metadata
+            that depends on the transform.
+    """
+    import kwimage
+    if item is None:
+        return None
+    elif isinstance(item, kwimage.Coords):
+        if not isinstance(item.data, np.ndarray):
+            raise _CannotBatchWarp
+        new = item if inplace else item.__class__(item.data, item.meta)
+        coords.append(new)
+    elif isinstance(item, kwimage.Points):
+        if 'tf_data_to_img' in item.meta:
+            raise _CannotBatchWarp
+        new = item if inplace else item.__class__(item.data.copy(), item.meta)
+        new.data['xy'] = _batch_warp_structure(new.data['xy'], inplace,
+                                               coords)
+    elif isinstance(item, kwimage.Polygon):
+        new = item if inplace else item.__class__(item.data.copy())
+        new.data['exterior'] = _batch_warp_structure(
+            new.data['exterior'], inplace, coords)
+        new.data['interiors'] = [
+            _batch_warp_structure(p, inplace, coords)
+            for p in new.data['interiors']
+        ]
+    elif isinstance(item, kwimage.Segmentation):
+        # Segmentation.warp returns the warped underlying object
+        new = _batch_warp_structure(item.data, inplace, coords)
+    elif isinstance(item, _generic.ObjectList):
+        newdata = [_batch_warp_structure(x, inplace, coords)
+                   for x in item.data]
+        new = item if inplace else item.__class__(newdata, item.meta)
+    else:
+        raise _CannotBatchWarp
+    return new
+
+
+def _warp_coords_list(matrix, coords):
+    """
+    Warps the data of multiple Coords objects with a single matrix multiply
+    """
+    import kwimage
+    if not coords:
+        return
+    lens = [len(c.data) for c in coords]
+    flat = np.concatenate([c.data for c in coords], axis=0)
+    flat = kwimage.warp_points(matrix, flat)
+    splits = np.cumsum(lens[:-1])
+    for c, part in zip(coords, np.split(flat, splits)):
+        c.data = part
+
+
+# Maps exact types to the kind of data they hold in Detections.__init__
+_TYPE_TO_KIND = {np.ndarray: 'numpy', _boxes.Boxes: 'boxes'}
+if torch is not None:
+    _TYPE_TO_KIND[torch.Tensor] = 'torch'
+
+
+def _array_kind(v):
+    """
+    Classifies a Detections data value as 'numpy', 'torch', 'boxes',
+    'objlist', or 'other'. Results are cached per type.
+    """
+    type_ = type(v)
+    try:
+        return _TYPE_TO_KIND[type_]
+    except KeyError:
+        pass
+    if _generic._isinstance2(v, _generic.ObjectList):
+        kind = 'objlist'
+    elif _generic._isinstance2(v, _boxes.Boxes):
+        kind = 'boxes'
+    elif isinstance(v, np.ndarray):
+        kind = 'numpy'
+    elif torch is not None and isinstance(v, torch.Tensor):
+        kind = 'torch'
+    else:
+        # Lists and scalars of any type need to be coerced, don't cache them
+        return 'other'
+    _TYPE_TO_KIND[type_] = kind
+    return kind
+
+
+@ub.memoize
+def _gaussian_kernel1d(k):
+    """
+    Returns the separable kernel used by ``cv2.GaussianBlur`` for a k x k
+    window with the default sigma.
+    """
+    import cv2
+    sigma = 0.3 * ((k - 1) * 0.5 - 1) + 0.8  # opencv formula
+    return cv2.getGaussianKernel(k, sigma)
+
+
+def _argsort_top_k(scores, top_k, reverse=True):
+    """
+    Indices of the top_k highest (or lowest if reverse is False) scores in
+    sorted order. Only the selected scores are sorted.
+    """
+    num = len(scores)
+    if torch is not None and torch.is_tensor(scores):
+        return torch.topk(scores, min(top_k, num), largest=reverse)[1]
+    key = -scores if reverse else scores
+    if top_k >= num:
+        return key.argsort(kind='stable')
+    part = np.argpartition(key, top_k)[:top_k]
+    return part[key[part].argsort(kind='stable')]
+
+
+def _deepcopy_value(val):
+    """
+    Deep copies a Detections data value. Arrays and boxes are copied directly,
+    which avoids the overhead of deepcopy, anything else falls back to it.
+    """
+    if val is None:
+        return None
+    elif type(val) is np.ndarray:
+        return val.copy()
+    elif torch is not None and torch.is_tensor(val):
+        return val.clone()
+    elif _generic._isinstance2(val, _boxes.Boxes):
+        return val.copy()
+    else:
+        import copy
+        return copy.deepcopy(val)
+
+
+def _asnumpy(data):
+    """
+    Converts a tensor into an ndarray
+    """
+    if torch is not None and torch.is_tensor(data):
+        data = data.detach().cpu().numpy()
+    return np.asarray(data)
+
+
+@ub.memoize
+def _normalized_gaussian_patch(h, w):
+    """
+    Returns a cached h x w gaussian patch scaled to have a maximum of 1.
+    The result is shared between calls and must not be modified.
+    """
+    import kwimage
+    blip = kwimage.gaussian_patch((h, w))
+    blip = blip / blip.max()
+    return blip
+
+
+def _is_noop_param(value, identity):
+    """
+    Checks if a scalar or per-axis transform parameter (e.g. a translation
+    offset or scale factor) is equal to the identity everywhere.
+    """
+    if isinstance(value, (int, float)):
+        return value == identity
+    try:
+        return bool(np.all(np.asarray(value) == identity))
+    except Exception:
+        return False
+
+
+def _tolist(data):
+    """
+    Converts an ndarray or tensor into a list of python scalars
+    """
+    if torch is not None and torch.is_tensor(data):
+        return _asnumpy(data).tolist()
+    if isinstance(data, np.ndarray):
+        return data.tolist()
+    return list(data)
+
+
 def _dets_to_fcmaps(dets, bg_size, input_dims, bg_idx=0, pmin=0.6, pmax=1.0,
-                    soft=True, exclude=[]):
+                    soft=True, exclude=[], impl='numpy'):
     """
     Construct semantic segmentation detection targets from annotations in
     dictionary format.
@@ -1409,6 +1855,8 @@ def _dets_to_fcmaps(dets, bg_size, input_dims, bg_idx=0, pmin=0.6, pmax=1.0,
         dets (kwimage.Detections):
         bg_size (tuple): size (W, H) to predict for backgrounds
         input_dims (tuple): window H, W
+        impl (str, default='numpy'): backend used to write the per-object
+            targets. Can be numpy or numba.
 
     Returns:
         dict: with keys
@@ -1486,24 +1934,83 @@ def _dets_to_fcmaps(dets, bg_size, input_dims, bg_idx=0, pmin=0.6, pmax=1.0,
                               labels=True, alpha=None)
         kwplot.imshow(raster)
         kwplot.show_if_requested()
+
+    Example:
+        >>> # Objects with a smaller area are drawn on top
+        >>> from kwimage.structs.detections import _dets_to_fcmaps
+        >>> import kwimage
+        >>> boxes = kwimage.Boxes(np.array([
+        >>>     [20, 20, 30, 4], [20, 20, 10, 30]]), 'cxywh')
+        >>> dets = kwimage.Detections(boxes=boxes, class_idxs=np.array([1, 2]),
+        >>>                           classes=['background', 'a', 'b'])
+        >>> fcn_target = _dets_to_fcmaps(dets, [10, 10], (40, 40), soft=False)
+        >>> print(fcn_target['cidx'][20, 20])
+        1
+    """
+    return _dets_to_fcmaps_into({}, dets, bg_size, input_dims, bg_idx=bg_idx,
+                                pmin=pmin, pmax=pmax, soft=soft,
+                                exclude=exclude, impl=impl)
+
+
+def _dets_to_fcmaps_into(out, dets, bg_size, input_dims, bg_idx=0, pmin=0.6,
+                         pmax=1.0, soft=True, exclude=[], impl='numpy'):
+    """
+    Like :func:`_dets_to_fcmaps`, but writes into the buffers in ``out``
+    when they are given. This lets a training loop reuse the same target
+    buffers for every batch. Missing buffers are taken from the pool (see
+    :func:`_acquire`). Every buffer is completely overwritten.
+
+    Args:
+        out (Dict[str, ndarray]): maps output keys (e.g. cidx, size, dxdy)
+            to preallocated buffers with the correct shape and dtype.
+
+    Returns:
+        Dict[str, ndarray]: the targets. Given buffers are used as-is.
+
+    Example:
+        >>> from kwimage.structs.detections import _dets_to_fcmaps_into
+        >>> import kwimage
+        >>> dets = kwimage.Detections.random(
+        >>>     num=5, classes=['background', 'a', 'b']).scale(32)
+        >>> out = {'cidx': np.empty((32, 32), dtype=np.int32)}
+        >>> target = _dets_to_fcmaps_into(out, dets, [10, 10], (32, 32))
+        >>> assert target['cidx'] is out['cidx']
+        >>> target2 = _dets_to_fcmaps(dets, [10, 10], (32, 32))
+        >>> for key in target2.keys():
+        >>>     assert np.all(target[key] == target2[key])
     """
     import cv2
+    input_dims = tuple(input_dims)
+
+    def _buffer(key, shape, dtype):
+        buf = out.get(key, None)
+        if buf is None:
+            buf = _acquire(shape, dtype)
+        elif buf.shape != shape or buf.dtype != dtype:
+            raise ValueError(
+                'out[{!r}] must have shape {} and dtype {}, got {} and {}'.format(
+                    key, shape, np.dtype(dtype), buf.shape, buf.dtype))
+        return buf
+
     # In soft mode we made a one-channel segmentation target mask
-    cidx_mask = np.full(input_dims, dtype=np.int32, fill_value=bg_idx)
+    cidx_mask = _buffer('cidx', input_dims, np.int32)
+    cidx_mask.fill(bg_idx)
 
     if 'class_probs' not in exclude:
         if soft:
             # In soft mode we add per-class channel probability blips
             num_obj_classes = len(dets.classes)
-            cidx_probs = np.full((num_obj_classes,) + tuple(input_dims),
-                                 dtype=np.float32, fill_value=0)
+            cidx_probs = _buffer('class_probs', (num_obj_classes,) + input_dims,
+                                 np.float32)
+            cidx_probs.fill(0)
 
     if 'diameter' not in exclude:
-        size_mask = np.empty((2,) + tuple(input_dims), dtype=np.float32)
+        size_mask = _buffer('size', (2,) + input_dims, np.float32)
         size_mask[:] = np.array(bg_size)[:, None, None]
 
     if 'offset' not in exclude:
-        dxdy_mask = np.zeros((2,) + tuple(input_dims), dtype=np.float32)
+        dxdy_mask = _buffer('dxdy', (2,) + input_dims, np.float32)
+        dxdy_mask.fill(0)
 
     dets = dets.numpy()
 
@@ -1512,8 +2019,8 @@ def _dets_to_fcmaps(dets, bg_size, input_dims, bg_idx=0, pmin=0.6, pmax=1.0,
     import kwimage
 
     if 'segmentations' in dets.data:
-        sseg_list = [None if p is None else p.to_mask(input_dims)
-                     for p in dets.data['segmentations']]
+        # These are rasterized one at a time when their object is drawn
+        sseg_list = list(dets.data['segmentations'])
     else:
         sseg_list = [None] * len(dets)
 
@@ -1530,37 +2037,40 @@ def _dets_to_fcmaps(dets, bg_size, input_dims, bg_idx=0, pmin=0.6, pmax=1.0,
 
         if kp_classes is not None:
             num_kp_classes = len(kp_classes)
-            kpts_mask = np.zeros((2, num_kp_classes) + tuple(input_dims),
-                                 dtype=np.float32)
+            kpts_mask = _buffer('kpts', (2, num_kp_classes) + input_dims,
+                                np.float32)
+            kpts_mask.fill(0)
+            kpts_ignore_mask = _buffer('kpts_ignore',
+                                       (num_kp_classes,) + input_dims,
+                                       np.float32)
+            kpts_ignore_mask.fill(1)
 
         pts_list = dets.data['keypoints'].data
-        for pts in pts_list:
-            if pts is not None:
-                pass
-
-        kpts_ignore_mask = np.ones((num_kp_classes,) + tuple(input_dims),
-                                   dtype=np.float32)
     else:
         pts_list = [None] * len(dets)
 
     # Overlay smaller classes on top of larger ones
-    if len(cxywh):
-        area = cxywh[..., 2] * cxywh[..., 2]
-    else:
-        area = []
+    area = cxywh[:, 2] * cxywh[:, 3]
     sortx = np.argsort(area)[::-1]
     cxywh = cxywh[sortx]
     class_idxs = class_idxs[sortx]
-    pts_list = list(ub.take(pts_list, sortx))
-    sseg_list = list(ub.take(sseg_list, sortx))
+    sortx_list = sortx.tolist()
+    pts_list = [pts_list[idx] for idx in sortx_list]
+    sseg_list = [sseg_list[idx] for idx in sortx_list]
 
     def iround(x):
         return int(round(x))
 
     H, W = input_dims
-    xcoord, ycoord = np.meshgrid(np.arange(W), np.arange(H))
 
-    for box, cidx, sseg_mask, pts in zip(cxywh, class_idxs, sseg_list, pts_list):
+    # Find the window and mask of each object, draw the soft class blips,
+    # and gather the keypoints that need to be encoded.
+    windows = []
+    subs = []
+    blips_by_class = ub.ddict(list)
+    kp_xys_list = []
+    kp_cidxs_list = []
+    for box, cidx, sseg, pts in zip(cxywh, class_idxs, sseg_list, pts_list):
         (cx, cy, w, h) = box
         center = (iround(cx), iround(cy))
         # Adjust so smaller objects get more pixels
@@ -1574,37 +2084,32 @@ def _dets_to_fcmaps(dets, bg_size, input_dims, bg_idx=0, pmin=0.6, pmax=1.0,
         half_h = iround(hf * h / 2 + 1)
         axes = (half_w, half_h)
 
-        if sseg_mask is None:
-            mask = np.zeros_like(cidx_mask, dtype=np.uint8)
-            mask = cv2.ellipse(mask, center, axes, angle=0.0,
-                               startAngle=0.0, endAngle=360.0, color=1,
-                               thickness=-1).astype(np.bool)
+        # Restrict all per-object work to the window containing the object
+        # instead of touching every pixel in the image.
+        if sseg is None:
+            x0 = max(center[0] - half_w, 0)
+            y0 = max(center[1] - half_h, 0)
+            x1 = max(min(center[0] + half_w + 1, W), x0)
+            y1 = max(min(center[1] + half_h + 1, H), y0)
+            sub = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            if sub.size:
+                sub_center = (center[0] - x0, center[1] - y0)
+                sub = cv2.ellipse(sub, sub_center, axes, angle=0.0,
+                                  startAngle=0.0, endAngle=360.0, color=1,
+                                  thickness=-1)
+            # The window only holds zeros and ones, so view it as a mask
+            # instead of copying it.
+            sub = sub.view(bool)
         else:
-            mask = sseg_mask.to_c_mask().data.astype(np.bool)
-        # class index
-        cidx_mask[mask] = int(cidx)
+            (y0, y1, x0, x1), sub = _rasterize_sseg_window(sseg, input_dims)
+        windows.append((y0, y1, x0, x1))
+        subs.append(sub)
+
         if 'class_probs' not in exclude:
             if soft:
-                blip = kwimage.gaussian_patch((half_h * 2, half_w * 2))
-                blip = blip / blip.max()
-                subindex = (slice(cy - half_h, cy + half_h),
-                            slice(cx - half_w, cx + half_w))
-                kwimage.subpixel_maximum(cidx_probs[cidx], blip, subindex)
-
-        # object size
-        if 'diameter' not in exclude:
-            size_mask[0][mask] = float(w)
-            size_mask[1][mask] = float(h)
-
-            assert np.all(size_mask[0][mask] == float(w))
-
-        # object offset
-        if 'offset' not in exclude:
-            dx = cx - xcoord[mask]
-            dy = cy - ycoord[mask]
-            dxdy_mask[0][mask] = dx
-            dxdy_mask[1][mask] = dy
+                blips_by_class[cidx].append((cx, cy, half_w, half_h))
 
+        _xys = _cidxs = None
         if kpts_mask is not None:
             if 'keypoints' not in exclude:
                 if pts is not None:
@@ -1615,17 +2120,52 @@ def _dets_to_fcmaps(dets, bg_size, input_dims, bg_idx=0, pmin=0.6, pmax=1.0,
                         if _cidxs is None:
                             raise ValueError(
                                 'cannot rasterize keypoints with undefined categories')
-                        for xy, kp_cidx in zip(_xys, _cidxs):
-                            if kp_cidx < 0:
-                                import warnings
-                                warnings.warn('Cannot rasterize keypoints with unknown classes')
-                            else:
-                                kp_x, kp_y = xy
-                                kp_dx = kp_x - xcoord[mask]
-                                kp_dy = kp_y - ycoord[mask]
-                                kpts_mask[0, kp_cidx][mask] = kp_dx
-                                kpts_mask[1, kp_cidx][mask] = kp_dy
-                                kpts_ignore_mask[kp_cidx][mask] = 0
+                        _cidxs = np.asarray(_cidxs)
+                        flags = _cidxs >= 0
+                        if not np.all(flags):
+                            import warnings
+                            warnings.warn('Cannot rasterize keypoints with unknown classes')
+                            _xys = _xys[flags]
+                            _cidxs = _cidxs[flags]
+                    else:
+                        _xys = None
+        kp_xys_list.append(_xys)
+        kp_cidxs_list.append(_cidxs)
+
+    # Draw the soft class blips one class at a time, so each probability
+    # plane is streamed through the cache once.
+    for cidx, blips in blips_by_class.items():
+        class_plane = cidx_probs[cidx]
+        for cx, cy, half_w, half_h in blips:
+            blip = _normalized_gaussian_patch(half_h * 2, half_w * 2)
+            subindex = (slice(cy - half_h, cy + half_h),
+                        slice(cx - half_w, cx + half_w))
+            kwimage.subpixel_maximum(class_plane, blip, subindex)
+
+    # Write the per-pixel targets. Objects are visited largest first, so
+    # smaller objects are written on top of larger ones.
+    # Placeholders for excluded outputs, which the numba kernel skips
+    empty3 = np.empty((0, 0, 0), dtype=np.float32)
+    empty4 = np.empty((0, 0, 0, 0), dtype=np.float32)
+    _size_mask = size_mask if 'diameter' not in exclude else empty3
+    _dxdy_mask = dxdy_mask if 'offset' not in exclude else empty3
+    if kpts_mask is not None and 'keypoints' not in exclude:
+        _kpts_mask = kpts_mask
+        _kpts_ignore_mask = kpts_ignore_mask
+    else:
+        _kpts_mask = empty4
+        _kpts_ignore_mask = empty3
+
+    if impl == 'numba':
+        _fcmap_fill_numba(windows, subs, class_idxs, cxywh, kp_xys_list,
+                          kp_cidxs_list, cidx_mask, _size_mask, _dxdy_mask,
+                          _kpts_mask, _kpts_ignore_mask)
+    elif impl == 'numpy':
+        _fcmap_fill_numpy(windows, subs, class_idxs, cxywh, kp_xys_list,
+                          kp_cidxs_list, cidx_mask, _size_mask, _dxdy_mask,
+                          _kpts_mask, _kpts_ignore_mask)
+    else:
+        raise KeyError(impl)
 
     fcn_target = {
         'cidx': cidx_mask,
@@ -1655,6 +2195,264 @@ def _dets_to_fcmaps(dets, bg_size, input_dims, bg_idx=0, pmin=0.6, pmax=1.0,
     return fcn_target
 
 
+def _rasterize_sseg_window(sseg, dims):
+    """
+    Rasterizes a segmentation only within the part of the image it covers.
+
+    Args:
+        sseg (Polygon | MultiPolygon | Mask | Segmentation): the segmentation
+        dims (Tuple[int, int]): height and width of the full image
+
+    Returns:
+        Tuple[Tuple[int, int, int, int], ndarray]:
+            the (y0, y1, x0, x1) window and the boolean mask inside of it.
+
+    Example:
+        >>> from kwimage.structs.detections import _rasterize_sseg_window
+        >>> import kwimage
+        >>> dims = (40, 50)
+        >>> sseg = kwimage.Polygon.random(rng=0).scale(60).translate(-5)
+        >>> (y0, y1, x0, x1), sub = _rasterize_sseg_window(sseg, dims)
+        >>> full = sseg.to_mask(dims).data.astype(bool)
+        >>> assert full.sum() == sub.sum()
+        >>> assert np.all(full[y0:y1, x0:x1] == sub)
+    """
+    import cv2
+    from kwimage.structs.polygon import Polygon, MultiPolygon
+    from kwimage.structs.segmentation import Segmentation
+    if isinstance(sseg, Segmentation):
+        sseg = sseg.data
+    H, W = dims[0:2]
+
+    if isinstance(sseg, (Polygon, MultiPolygon)):
+        # Fill the polygons within their bounding box. They are filled the
+        # same way as in Polygon.fill, only offset into the window.
+        polys = [sseg] if isinstance(sseg, Polygon) else sseg.data
+        poly_contours = [p._to_cv_countours() for p in polys if p is not None]
+        poly_contours = [cs for cs in poly_contours if sum(map(len, cs))]
+        if poly_contours:
+            pts = np.concatenate([c for cs in poly_contours for c in cs])
+            (x0, y0), (x1, y1) = pts.min(axis=(0, 1)), pts.max(axis=(0, 1))
+            x0, y0 = max(x0, 0), max(y0, 0)
+            x1, y1 = max(min(x1 + 1, W), x0), max(min(y1 + 1, H), y0)
+        else:
+            x0 = x1 = y0 = y1 = 0
+        sub = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        if sub.size:
+            for cv_contours in poly_contours:
+                cv2.fillPoly(sub, cv_contours, 1, cv2.LINE_8, shift=0,
+                             offset=(-int(x0), -int(y0)))
+        sub = sub.view(bool)
+    else:
+        # Otherwise rasterize the full mask and crop it to its extent
+        mask = sseg.to_mask(dims).to_c_mask().data
+        row_flags = mask.any(axis=1)
+        col_flags = mask.any(axis=0)
+        if row_flags.any():
+            y0, y1 = np.flatnonzero(row_flags)[[0, -1]] + (0, 1)
+            x0, x1 = np.flatnonzero(col_flags)[[0, -1]] + (0, 1)
+        else:
+            x0 = x1 = y0 = y1 = 0
+        sub = mask[y0:y1, x0:x1] != 0
+    return (int(y0), int(y1), int(x0), int(x1)), sub
+
+
+# Released fcmap buffers, keyed by shape and dtype. Each thread has its own
+# pool, so a buffer is never handed to two threads at once.
+_FCMAP_POOL = threading.local()
+_FCMAP_POOL_MAXSIZE = 4
+
+
+def _pool_bucket(key):
+    try:
+        buckets = _FCMAP_POOL.buckets
+    except AttributeError:
+        buckets = _FCMAP_POOL.buckets = ub.ddict(list)
+    return buckets[key]
+
+
+def _acquire(shape, dtype):
+    """
+    Returns an uninitialized array, reusing a buffer released by the current
+    thread if one with the same shape and dtype is available.
+    """
+    key = (tuple(shape), np.dtype(dtype))
+    try:
+        return _pool_bucket(key).pop()
+    except IndexError:
+        return np.empty(key[0], dtype=key[1])
+
+
+def _release(arr):
+    """
+    Returns a buffer to the pool used by :func:`_acquire`. The caller must not
+    use the array afterwards. Views are ignored.
+
+    Example:
+        >>> from kwimage.structs.detections import _acquire, _release
+        >>> arr = _acquire((3, 5), np.float32)
+        >>> _release(arr)
+        >>> assert _acquire((3, 5), np.float32) is arr
+        >>> _release(arr[0:1])
+        >>> assert _acquire((1, 5), np.float32) is not arr
+        >>> # Other threads do not see buffers released by this one
+        >>> import threading
+        >>> _release(arr)
+        >>> found = []
+        >>> thread = threading.Thread(
+        >>>     target=lambda: found.append(_acquire((3, 5), np.float32)))
+        >>> thread.start()
+        >>> thread.join()
+        >>> assert found[0] is not arr
+        >>> assert _acquire((3, 5), np.float32) is arr
+    """
+    if isinstance(arr, np.ndarray) and arr.base is None:
+        bucket = _pool_bucket((arr.shape, arr.dtype))
+        if len(bucket) < _FCMAP_POOL_MAXSIZE:
+            bucket.append(arr)
+
+
+def _fcmap_fill_numpy(windows, subs, class_idxs, cxywh, kp_xys_list,
+                      kp_cidxs_list, cidx_mask, size_mask, dxdy_mask,
+                      kpts_mask, kpts_ignore_mask):
+    """
+    Writes the per-pixel targets of each object into the fcmaps in order.
+    Excluded outputs are given as empty arrays.
+    """
+    # Each write is a masked copy within the object's window. The offsets
+    # broadcast from a row / column of coordinates, so the masked pixels are
+    # never gathered into temporary arrays.
+    H, W = cidx_mask.shape
+    xs = np.arange(W)
+    ys = np.arange(H)[:, None]
+    for (y0, y1, x0, x1), sub, cidx, box, _xys, _cidxs in zip(
+            windows, subs, class_idxs, cxywh, kp_xys_list, kp_cidxs_list):
+        (cx, cy, w, h) = box
+        window = (slice(y0, y1), slice(x0, x1))
+        sub_xs = xs[x0:x1]
+        sub_ys = ys[y0:y1]
+
+        # class index
+        np.copyto(cidx_mask[window], int(cidx), where=sub)
+
+        # object size
+        if size_mask.size:
+            np.copyto(size_mask[0][window], float(w), where=sub)
+            np.copyto(size_mask[1][window], float(h), where=sub)
+
+        # object offset
+        if dxdy_mask.size:
+            np.copyto(dxdy_mask[0][window], cx - sub_xs, where=sub,
+                      casting='unsafe')
+            np.copyto(dxdy_mask[1][window], cy - sub_ys, where=sub,
+                      casting='unsafe')
+
+        # keypoint offsets
+        if kpts_mask.size and _xys is not None:
+            for (kp_x, kp_y), kp_cidx in zip(_xys, _cidxs):
+                np.copyto(kpts_mask[0, kp_cidx][window], kp_x - sub_xs,
+                          where=sub, casting='unsafe')
+                np.copyto(kpts_mask[1, kp_cidx][window], kp_y - sub_ys,
+                          where=sub, casting='unsafe')
+                np.copyto(kpts_ignore_mask[kp_cidx][window], 0, where=sub)
+
+
+def _fcmap_fill_numba(windows, subs, class_idxs, cxywh, kp_xys_list,
+                      kp_cidxs_list, cidx_mask, size_mask, dxdy_mask,
+                      kpts_mask, kpts_ignore_mask):
+    """
+    Packs the objects into flat arrays and writes all of their per-pixel
+    targets in a single parallel numba pass. Gives the same result as
+    :func:`_fcmap_fill_numpy`.
+
+    Example:
+        >>> # xdoctest: +REQUIRES(module:numba)
+        >>> from kwimage.structs.detections import _dets_to_fcmaps
+        >>> import kwimage
+        >>> rng = np.random.RandomState(0)
+        >>> dets = kwimage.Detections.random(
+        >>>     num=20, classes=['background', 'a', 'b'], keypoints=True,
+        >>>     segmentations=True, rng=rng).scale(64)
+        >>> kw = dict(bg_size=[10, 10], input_dims=(60, 70), soft=False)
+        >>> target1 = _dets_to_fcmaps(dets, impl='numpy', **kw)
+        >>> target2 = _dets_to_fcmaps(dets, impl='numba', **kw)
+        >>> for key in target1.keys():
+        >>>     assert np.all(target1[key] == target2[key])
+    """
+    num = len(windows)
+    if num == 0:
+        return
+    kernel = _numba_fcmap_kernel()
+    windows = np.array(windows, dtype=np.int64).reshape(num, 4)
+    sub_offsets = np.zeros(num + 1, dtype=np.int64)
+    np.cumsum([sub.size for sub in subs], out=sub_offsets[1:])
+    flat_subs = np.concatenate([sub.ravel() for sub in subs])
+    kp_counts = [0 if c is None else len(c) for c in kp_cidxs_list]
+    kp_offsets = np.zeros(num + 1, dtype=np.int64)
+    np.cumsum(kp_counts, out=kp_offsets[1:])
+    if kp_offsets[-1]:
+        kp_xys = np.concatenate([
+            xys for xys in kp_xys_list if xys is not None]).astype(np.float64)
+        kp_cidxs = np.concatenate([
+            c for c in kp_cidxs_list if c is not None]).astype(np.int64)
+    else:
+        kp_xys = np.empty((0, 2), dtype=np.float64)
+        kp_cidxs = np.empty(0, dtype=np.int64)
+    kernel(windows, flat_subs, sub_offsets,
+           np.asarray(class_idxs, dtype=np.int64),
+           np.asarray(cxywh, dtype=np.float64), kp_xys, kp_cidxs, kp_offsets,
+           cidx_mask, size_mask, dxdy_mask, kpts_mask, kpts_ignore_mask)
+
+
+@ub.memoize
+def _numba_fcmap_kernel():
+    """
+    Lazily compiles the numba kernel used by :func:`_fcmap_fill_numba`
+    """
+    import numba
+
+    @numba.njit(parallel=True, cache=True)
+    def _kernel(windows, flat_subs, sub_offsets, class_idxs, cxywh, kp_xys,
+                kp_cidxs, kp_offsets, cidx_mask, size_mask, dxdy_mask,
+                kpts_mask, kpts_ignore_mask):
+        H = cidx_mask.shape[0]
+        num = windows.shape[0]
+        do_size = size_mask.size > 0
+        do_dxdy = dxdy_mask.size > 0
+        do_kpts = kpts_mask.size > 0
+        # Rows are independent, and within a row the objects are visited in
+        # order, so later (smaller) objects overwrite earlier ones.
+        for y in numba.prange(H):
+            for i in range(num):
+                y0 = windows[i, 0]
+                y1 = windows[i, 1]
+                if y < y0 or y >= y1:
+                    continue
+                x0 = windows[i, 2]
+                x1 = windows[i, 3]
+                cidx = class_idxs[i]
+                cx = cxywh[i, 0]
+                cy = cxywh[i, 1]
+                k = sub_offsets[i] + (y - y0) * (x1 - x0)
+                for x in range(x0, x1):
+                    if flat_subs[k]:
+                        cidx_mask[y, x] = cidx
+                        if do_size:
+                            size_mask[0, y, x] = cxywh[i, 2]
+                            size_mask[1, y, x] = cxywh[i, 3]
+                        if do_dxdy:
+                            dxdy_mask[0, y, x] = cx - x
+                            dxdy_mask[1, y, x] = cy - y
+                        if do_kpts:
+                            for j in range(kp_offsets[i], kp_offsets[i + 1]):
+                                kp_cidx = kp_cidxs[j]
+                                kpts_mask[0, kp_cidx, y, x] = kp_xys[j, 0] - x
+                                kpts_mask[1, kp_cidx, y, x] = kp_xys[j, 1] - y
+                                kpts_ignore_mask[kp_cidx, y, x] = 0
+                    k += 1
+    return _kernel
+
+
 if __name__ == '__main__':
     """
     CommandLine:
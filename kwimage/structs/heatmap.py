@@ -82,7 +82,6 @@ import ubelt as ub
 import skimage
 import kwarray
 import six
-import functools
 from . import _generic
 
 try:
@@ -136,7 +135,7 @@ class _HeatmapDrawMixin(object):
             xdoctest -m ~/code/kwimage/kwimage/structs/heatmap.py _HeatmapDrawMixin.colorize --show
 
         Example:
-            >>> # xdoctest: +REQUIRES(module:kwplot)
+            >>> # xdoctest: +REQUIRES(module:matplotlib)
             >>> self = Heatmap.random(rng=0, dims=(32, 32))
             >>> colormask1 = self.colorize(0, imgspace=False)
             >>> colormask2 = self.colorize(0, imgspace=True)
@@ -148,7 +147,7 @@ class _HeatmapDrawMixin(object):
             >>> kwplot.show_if_requested()
 
         Example:
-            >>> # xdoctest: +REQUIRES(module:kwplot)
+            >>> # xdoctest: +REQUIRES(module:matplotlib)
             >>> self = Heatmap.random(rng=0, dims=(32, 32))
             >>> colormask1 = self.colorize('diameter', imgspace=False)
             >>> colormask2 = self.colorize('diameter', imgspace=True)
@@ -170,7 +169,7 @@ class _HeatmapDrawMixin(object):
             >>> kwplot.imshow(colormask1, fnum=1, title='output space')
             >>> kwplot.show_if_requested()
         """
-        import kwplot
+        import kwimage
 
         if channel is None:
             if 'class_idx' in self.data:
@@ -237,9 +236,9 @@ class _HeatmapDrawMixin(object):
             else:
                 a = self
             if channel == 'offset':
-                mask = np.linalg.norm(a.offset, axis=0)
+                mask = _vector_magnitude(a.offset)
             elif channel == 'diameter':
-                mask = np.linalg.norm(a.diameter, axis=0)
+                mask = _vector_magnitude(a.diameter)
             elif channel == 'class_probs_max':
                 if 'class_probs' in a.data:
                     data = a.data['class_probs']
@@ -282,19 +281,27 @@ class _HeatmapDrawMixin(object):
                 return colormask
             else:
                 raise KeyError(channel)
-            mask = mask / np.maximum(mask.max(), 1e-9)
+            # mask is always a new array here, so normalize it inplace
+            mask = np.divide(mask, np.maximum(mask.max(), 1e-9), out=mask)
         else:
+            owned = False
             if imgspace:
                 mask = self.upscale(channel, interpolation=interpolation)[0]
+                # upscale only returns a view of the data if no warp is needed
+                owned = (isinstance(self.class_probs, np.ndarray) and
+                         not np.may_share_memory(mask, self.class_probs))
             else:
                 mask = self.class_probs[channel]
 
             if invert:
-                mask = 1 - mask
+                if owned:
+                    mask = np.subtract(1, mask, out=mask)
+                else:
+                    mask = 1 - mask
 
         if cmap is None:
             cmap = 'plasma'
-        colormask = kwplot.make_heatmask(mask, with_alpha=with_alpha, cmap=cmap)
+        colormask = kwimage.make_heatmask(mask, with_alpha=with_alpha, cmap=cmap)
         return colormask
 
     def draw_stacked(self, image=None, dsize=(224, 224), ignore_class_idxs={},
@@ -321,15 +328,18 @@ class _HeatmapDrawMixin(object):
                 mat = np.linalg.inv(tf.params)
 
         cmap = mpl.cm.get_cmap('magma')
+        # Lookup table with the same binning matplotlib uses for floats
+        lut = cmap(np.arange(cmap.N), bytes=True)[:, 0:3]
 
         level_dsize = self.class_probs.shape[-2:][::-1]
 
         if chosen_cxs is None:
             if top is not None:
                 # Find the categories with the most "heat"
-                cx_to_score = self.class_probs.mean(2).mean(1)
-                for cx in ignore_class_idxs:
-                    cx_to_score[cx] = -np.inf
+                num_classes = self.class_probs.shape[0]
+                cx_to_score = self.class_probs.reshape(num_classes, -1).mean(1)
+                if ignore_class_idxs:
+                    cx_to_score[list(ignore_class_idxs)] = -np.inf
                 chosen_cxs = kwarray.ArrayAPI.numpy(cx_to_score).argsort()[::-1][:top]
             else:
                 chosen_cxs = np.arange(self.class_probs.shape[0])
@@ -351,9 +361,9 @@ class _HeatmapDrawMixin(object):
                 node = self.classes[cx]
             else:
                 node = 'cx={}'.format(cx)
-            c = self.class_probs[cx]
-            c = cmap(c)
-            c = (c[..., 0:3] * 255.0).astype(np.uint8)
+            idx = np.multiply(self.class_probs[cx], cmap.N).astype(np.intp)
+            np.clip(idx, 0, cmap.N - 1, out=idx)
+            c = lut[idx]
             c = cv2.resize(c, dsize)
             c = kwimage.draw_text_on_image(c, '{}'.format(node), (0, 20), fontScale=.5)
             # kwplot.imshow(c, title=str(i), fnum=2)
@@ -493,7 +503,7 @@ class _HeatmapDrawMixin(object):
                     dx, dy, stride=4, scale=1.0, alpha=with_alpha * vec_alpha,
                     color=color)
                 vec_alpha = max(.1, vec_alpha - .1)
-                chw = torch.Tensor(vecmask.transpose(2, 0, 1))
+                chw = vecmask.transpose(2, 0, 1)
                 vecalign = self._warp_imgspace(chw, interpolation=interpolation)
                 vecalign = vecalign.transpose(1, 2, 0)
                 # print('vecalign = {!r}'.format(vecalign))
@@ -513,7 +523,7 @@ class _HeatmapDrawMixin(object):
                                                         alpha=with_alpha *
                                                         vec_alpha, color=color)
                     vec_alpha = max(.1, vec_alpha - .1)
-                    chw = torch.Tensor(vecmask.transpose(2, 0, 1))
+                    chw = vecmask.transpose(2, 0, 1)
                     vecalign = self._warp_imgspace(chw, interpolation=interpolation)
                     vecalign = vecalign.transpose(1, 2, 0)
                     print('vecalign = {!r}'.format(vecalign))
@@ -545,7 +555,6 @@ class _HeatmapWarpMixin(object):
             Heatmap: warped version of `other` that aligns with `self`.
 
         Example:
-            >>> # xdoctest: +REQUIRES(module:torch)
             >>> self = Heatmap.random((120, 130), img_dims=(200, 210), classes=2, nblips=10, rng=0)
             >>> other = Heatmap.random((60, 70), img_dims=(200, 210), classes=2, nblips=10, rng=1)
             >>> other2 = self._align_other(other)
@@ -564,9 +573,10 @@ class _HeatmapWarpMixin(object):
         assert self.classes == other.classes
         assert np.all(self.img_dims == other.img_dims)
 
-        img_to_self = np.linalg.inv(self.tf_data_to_img.params)
+        # other_to_self = inv(self_to_img) @ other_to_img
+        self_to_img = self.tf_data_to_img.params
         other_to_img = other.tf_data_to_img.params
-        other_to_self = np.matmul(img_to_self, other_to_img)
+        other_to_self = np.linalg.solve(self_to_img, other_to_img)
 
         mat = other_to_self
         output_dims = self.class_probs.shape[1:]
@@ -588,26 +598,34 @@ class _HeatmapWarpMixin(object):
         # flags = kwimage.im_cv2._rectify_interpolation('nearest')
         flags = kwimage.im_cv2._rectify_interpolation(interpolation)
         aligned = cv2.warpAffine(mask, M[0:2], dsize=tuple(dsize), flags=flags)
-        aligned = np.clip(aligned, 0, 1)
+        # aligned is a new array owned by us, so clip it inplace
+        aligned = np.clip(aligned, 0, 1, out=aligned)
         return aligned
 
     def _warp_imgspace(self, chw, interpolation='linear'):
         import kwimage
         if self.tf_data_to_img is None and self.img_dims is None:
-            aligned = chw.cpu().numpy()
+            aligned = kwarray.ArrayAPI.numpy(chw)
         else:
             if self.tf_data_to_img is None:
                 # If img dims are the same then we dont need a transform we
                 # know its identity
                 if self.img_dims == self.dims:
-                    return chw.cpu().numpy()
+                    return kwarray.ArrayAPI.numpy(chw)
 
             output_dims = self.img_dims
-            mat = torch.Tensor(self.tf_data_to_img.params[0:3])
-            outputs = kwimage.warp_tensor(
-                chw[None, :], mat, output_dims=output_dims, mode=interpolation
-            )
-            aligned = outputs[0].cpu().numpy()
+            if torch is not None and torch.is_tensor(chw) and chw.is_cuda:
+                mat = torch.from_numpy(np.ascontiguousarray(
+                    self.tf_data_to_img.params[0:3], dtype=np.float32))
+                outputs = kwimage.warp_tensor(
+                    chw[None, :], mat, output_dims=output_dims,
+                    mode=interpolation
+                )
+                aligned = outputs[0].cpu().numpy()
+            else:
+                aligned = _warp_affine_chw(
+                    chw, self.tf_data_to_img.params, output_dims,
+                    interpolation=interpolation)
         return aligned
 
     def upscale(self, channel=None, interpolation='linear'):
@@ -615,15 +633,15 @@ class _HeatmapWarpMixin(object):
         Warp the heatmap with the image dimensions
 
         Example:
-            >>> # xdoctest: +REQUIRES(module:torch)
             >>> self = Heatmap.random(rng=0, dims=(32, 32))
             >>> colormask = self.upscale()
+            >>> assert colormask.shape[1:] == tuple(self.img_dims)
 
         """
         if channel is None:
-            chw = torch.Tensor(self.class_probs)
+            chw = self.class_probs
         else:
-            chw = torch.Tensor(self.class_probs[channel])[None, :]
+            chw = self.class_probs[channel][None, :]
         aligned = self._warp_imgspace(chw, interpolation=interpolation)
         return aligned
 
@@ -664,7 +682,6 @@ class _HeatmapWarpMixin(object):
             assert R2 == R3
 
         Example:
-            >>> # xdoctest: +REQUIRES(module:torch)
             >>> from kwimage.structs.heatmap import *  # NOQA
             >>> self = Heatmap.random(rng=0, keypoints=True)
             >>> S = 3.0
@@ -701,7 +718,11 @@ class _HeatmapWarpMixin(object):
         newdata = {}
         newmeta = self.meta.copy()
 
-        impl = kwarray.ArrayAPI.coerce('tensor')
+        if torch is not None:
+            impl = kwarray.ArrayAPI.coerce('tensor')
+        else:
+            # Without torch the data stays in numpy and is warped with cv2
+            impl = kwarray.ArrayAPI.coerce('numpy')
 
         if version is None:
             import warnings
@@ -723,12 +744,18 @@ class _HeatmapWarpMixin(object):
         else:
             raise KeyError(version)
 
-        mat = impl.asarray(mat)
-
-        tf = skimage.transform.AffineTransform(matrix=mat)
-        # hack: need to get a version of the matrix without any translation
-        tf_notrans = _remove_translation(tf)
-        mat_notrans = torch.Tensor(tf_notrans.params)
+        # Work with the raw matrix instead of building skimage transforms.
+        # For an affine matrix, removing the translation is just zeroing the
+        # last column of the linear part.
+        mat_np = np.asarray(kwarray.ArrayAPI.numpy(mat), dtype=np.float64)
+        notrans_np = mat_np.copy()
+        notrans_np[0:2, 2] = 0
+        is_affine = np.all(mat_np[2] == [0, 0, 1])
+        if impl.is_tensor:
+            mat = torch.from_numpy(mat_np.astype(np.float32))
+            mat_notrans = torch.from_numpy(notrans_np.astype(np.float32))
+        else:
+            mat_notrans = notrans_np
 
         if output_dims is None:
             # If output dimensions are not specified warp the existing dims
@@ -740,12 +767,12 @@ class _HeatmapWarpMixin(object):
                 corners = kwimage.Coords(np.array([
                     [0., 0], [w, 0], [w, h], [0, h],
                 ]))
-                corners2 = corners.warp(mat.numpy())
+                corners2 = corners.warp(mat)
                 wh2 = corners2.data.clip(1, None).max(axis=0)
                 w2, h2 = np.ceil(wh2).astype(np.int).tolist()
                 output_dims = (w2, h2)
                 return output_dims
-            output_dims = _auto_select_warped_output_shape(mat_notrans)
+            output_dims = _auto_select_warped_output_shape(notrans_np)
             if self.img_dims is not None:
                 import warnings
                 warnings.warn(
@@ -758,39 +785,55 @@ class _HeatmapWarpMixin(object):
 
         # Modify data_to_img so the new heatmap will also properly upscale to
         # the image coordinates.
-        inv_tf = skimage.transform.AffineTransform(matrix=tf._inv_matrix)
         # newmeta['tf_data_to_img'] = self.tf_data_to_img + inv_tf
         # NOTE: The old models were working with the above code, but I think
         # thats because there was no translation factor. I'm pretty sure the
         # code on the bottom is correct. Obviously if something messes up, it
         # should probably be reverted. Left-vs-right is hard.
         if self.tf_data_to_img is not None:
+            inv_tf = skimage.transform.AffineTransform(
+                matrix=np.linalg.inv(mat_np))
             newmeta['tf_data_to_img'] = inv_tf + self.tf_data_to_img
 
         for k, v in self.data.items():
             if v is not None:
-                v = kwarray.ArrayAPI.tensor(v)
+                if impl.is_tensor:
+                    v = kwarray.ArrayAPI.tensor(v)
+                    is_cuda = v.is_cuda
+                else:
+                    v = kwarray.ArrayAPI.numpy(v)
+                    is_cuda = False
                 # For spatial keys we need to transform the underlying values
                 # in addition to where those values are located.
                 if modify_spatial_coords:
                     if k in self.__spatialkeys__:
-                        pts = impl.contiguous(impl.T(v))
-                        pts = kwimage.warp_points(mat_notrans, pts)
-                        v = impl.contiguous(impl.T(pts))
+                        if is_cuda or not is_affine:
+                            pts = impl.contiguous(impl.T(v))
+                            pts = kwimage.warp_points(mat_notrans, pts)
+                            v = impl.contiguous(impl.T(pts))
+                        else:
+                            v = _warp_vector_components(
+                                notrans_np, kwarray.ArrayAPI.numpy(v))
 
                 if kwarray.ArrayAPI.dtype_kind(v) == 'i':
                     # use different interpolation for integer types
                     if int_interpolation != 'nearest':
                         warnings.warn('Using non-nearest int interpolation')
-                    new_v = kwimage.warp_tensor(
-                        v[None, :].float(), mat, output_dims=output_dims,
-                        mode=int_interpolation)[0]
+                    mode = int_interpolation
                 else:
+                    mode = interpolation
+
+                if is_cuda:
                     new_v = kwimage.warp_tensor(
                         v[None, :].float(), mat, output_dims=output_dims,
-                        mode=interpolation)[0]
+                        mode=mode)[0]
+                else:
+                    new_v = _warp_affine_chw(v, mat_np, output_dims,
+                                             interpolation=mode)
+                    if impl.is_tensor:
+                        new_v = torch.from_numpy(new_v)
 
-                newdata[k] = impl.asarray(new_v)
+                newdata[k] = new_v
 
         newself = self.__class__(newdata, newmeta)
         return newself
@@ -841,12 +884,12 @@ class _HeatmapAlgoMixin(object):
             heatmaps (Sequence[Heatmap]): multiple heatmaps to combine into one
             root_index (int): which heatmap in the sequence to align other
                 heatmaps with
+            dtype (type, default=np.float32): dtype of the combined data
 
         Returns:
             Heatmap: the combined heatmap
 
         Example:
-            >>> # xdoctest: +REQUIRES(module:torch)
             >>> from kwimage.structs.heatmap import *  # NOQA
             >>> a = Heatmap.random((120, 130), img_dims=(200, 210), classes=2, nblips=10, rng=0)
             >>> b = Heatmap.random((60, 70), img_dims=(200, 210), classes=2, nblips=10, rng=1)
@@ -875,31 +918,35 @@ class _HeatmapAlgoMixin(object):
             >>> kwplot.imshow(c.colorize('diameter', imgspace=1), fnum=3, pnum=(4, 1, 3))
             >>> kwplot.imshow(newself.colorize('diameter', imgspace=1), fnum=3, pnum=(4, 1, 4))
         """
-        # define arithmetic and geometric mean
-        amean = functools.partial(np.mean, axis=0)
-
         # If the root is not specified use the largest heatmap
         if root_index is None:
             root_index = ub.argmax([np.prod(h.shape) for h in heatmaps])
         root = heatmaps[root_index]
-        aligned_heatmaps = [root._align_other(h).numpy() for h in heatmaps]
-        aligned_root = aligned_heatmaps[root_index]
+        aligned_root = root.numpy()
+
+        # Align each heatmap directly into one stacked buffer per key, so
+        # each mean is a single reduction over the leading axis.
+        keys = [key for key in ['class_probs', 'offset', 'diameter', 'keypoints']
+                if aligned_root.data.get(key, None) is not None]
+        stacks = {
+            key: np.empty((len(heatmaps),) + aligned_root.data[key].shape,
+                          dtype=dtype)
+            for key in keys
+        }
+        for idx, heatmap in enumerate(heatmaps):
+            aligned = root._align_other(heatmap).numpy()
+            for key in keys:
+                stacks[key][idx] = aligned.data[key]
+            aligned = None
 
         # Use the appropriate mean for each type of data
         newdata = {}
-        if 'class_probs' in aligned_root.data:
-            import warnings
-            with warnings.catch_warnings():
-                warnings.filterwarnings('ignore', 'divide by zero')
-                tmp = np.array([h.class_probs.astype(dtype) for h in aligned_heatmaps], dtype=dtype)
-                newdata['class_probs'] = _gmean(tmp, clobber=True)
-                tmp = None
-        if 'offset' in aligned_root.data:
-            newdata['offset'] = amean([h.offset for h in aligned_heatmaps])
-        if 'diameter' in aligned_root.data:
-            newdata['diameter'] = amean([h.diameter for h in aligned_heatmaps])
-        if 'keypoints' in aligned_root.data and aligned_root.data['keypoints'] is not None:
-            newdata['keypoints'] = amean([h.data['keypoints'] for h in aligned_heatmaps])
+        for key, stack in stacks.items():
+            if key == 'class_probs':
+                newdata[key] = _gmean(stack, clobber=True)
+            else:
+                newdata[key] = stack.mean(axis=0)
+        stacks = None
         newself = aligned_root.__class__(newdata, aligned_root.meta)
         return newself
 
@@ -1317,9 +1364,9 @@ class Heatmap(_generic.Spatial, _HeatmapDrawMixin,
 
         class_probs = self.data['class_probs']
 
-        noise = (rng.randn(*class_probs.shape) * noise)
-        class_probs += noise
-        np.clip(class_probs, 0, None, out=class_probs)
+        if noise:
+            class_probs += rng.randn(*class_probs.shape) * noise
+            np.clip(class_probs, 0, None, out=class_probs)
         # class_probs = class_probs / class_probs.sum(axis=0)
         class_probs = np.array([smooth_prob(p) for p in class_probs])
         class_probs = class_probs / np.maximum(class_probs.sum(axis=0), 1e-9)
@@ -1664,26 +1711,133 @@ def _remove_translation(tf):
     return tf_notrans
 
 
+def _warp_affine_chw(chw, mat, output_dims, interpolation='linear'):
+    """
+    Warp the trailing two spatial dimensions of an array with
+    ``cv2.warpAffine``.
+
+    Each channel is warped as a contiguous plane directly into the output,
+    which avoids transposing to and from HWC and lifts the 4 channel limit
+    cv2 has for cubic and lanczos interpolation.
+
+    Args:
+        chw (ArrayLike): C x H x W data. Any number of leading dimensions
+            (including none) is allowed, e.g. 2 x K x H x W keypoints.
+        mat (ArrayLike): 2x3 or 3x3 affine matrix in xy space
+        output_dims (Tuple[int, int]): height and width of the output
+        interpolation (str): interpolation key (e.g. linear or nearest)
+
+    Returns:
+        ndarray: the C x H2 x W2 float32 warped data, with the same leading
+            dimensions as the input.
+
+    Example:
+        >>> from kwimage.structs.heatmap import _warp_affine_chw
+        >>> rng = np.random.RandomState(0)
+        >>> chw = rng.rand(6, 8, 9).astype(np.float32)
+        >>> mat = np.array([[2., .1, 1], [0, 2, 0], [0, 0, 1]])
+        >>> warped = _warp_affine_chw(chw, mat, (16, 18))
+        >>> assert warped.shape == (6, 16, 18)
+        >>> hwc = cv2.warpAffine(chw.transpose(1, 2, 0).copy(), mat[0:2],
+        >>>                      dsize=(18, 16), flags=cv2.INTER_LINEAR)
+        >>> assert np.allclose(warped, hwc.transpose(2, 0, 1))
+        >>> assert _warp_affine_chw(chw[0], mat, (16, 18)).shape == (16, 18)
+        >>> kpts = rng.rand(2, 3, 8, 9)
+        >>> assert _warp_affine_chw(kpts, mat, (16, 18)).shape == (2, 3, 16, 18)
+    """
+    import kwimage
+    if interpolation == 'bilinear':
+        # accept the torch name used by warp_tensor
+        interpolation = 'linear'
+    flags = kwimage.im_cv2._rectify_interpolation(interpolation)
+    M = np.asarray(kwarray.ArrayAPI.numpy(mat), dtype=np.float64)[0:2]
+    h, w = map(int, output_dims[0:2])
+    chw = np.asarray(kwarray.ArrayAPI.numpy(chw), dtype=np.float32)
+    leading = chw.shape[:-2]
+    planes = chw.reshape((-1,) + chw.shape[-2:])
+    warped = np.empty((len(planes), h, w), dtype=np.float32)
+    for src, dst in zip(planes, warped):
+        cv2.warpAffine(np.ascontiguousarray(src), M, dsize=(w, h),
+                       dst=dst, flags=flags)
+    return warped.reshape(leading + (h, w))
+
+
+def _warp_vector_components(mat, vecs):
+    """
+    Apply the linear part of an affine matrix to an array of vectors whose
+    two components are stacked along the first axis. This is what
+    :func:`kwimage.warp_points` does with a translation free matrix, but as
+    a single matrix multiply without the homogeneous coordinates.
+
+    Args:
+        mat (ndarray): 3x3 or 2x3 affine matrix (translation is ignored)
+        vecs (ndarray): 2 x ... array of vector components
+
+    Returns:
+        ndarray: the transformed components with the same shape as ``vecs``
+
+    Example:
+        >>> import kwimage
+        >>> rng = np.random.RandomState(0)
+        >>> vecs = rng.rand(2, 8, 9)
+        >>> mat = np.array([[2., .1, 0], [.3, 2, 0], [0, 0, 1]])
+        >>> got = _warp_vector_components(mat, vecs)
+        >>> want = kwimage.warp_points(mat, vecs.T).T
+        >>> assert np.allclose(got, want)
+    """
+    if vecs.dtype.kind != 'f':
+        vecs = vecs.astype(np.float32)
+    A = np.asarray(mat[0:2, 0:2], dtype=vecs.dtype)
+    flat = vecs.reshape(2, -1)
+    return np.matmul(A, flat).reshape(vecs.shape)
+
+
+def _vector_magnitude(vecs):
+    """
+    Euclidean norm over the first axis of an array of stacked vector
+    components. Equivalent to ``np.linalg.norm(vecs, axis=0)``, but fuses the
+    square and sum into one pass.
+
+    Example:
+        >>> rng = np.random.RandomState(0)
+        >>> vecs = rng.rand(2, 8, 9).astype(np.float32)
+        >>> mag = _vector_magnitude(vecs)
+        >>> assert mag.dtype == vecs.dtype
+        >>> assert np.allclose(mag, np.linalg.norm(vecs, axis=0))
+    """
+    vecs = kwarray.ArrayAPI.numpy(vecs)
+    if vecs.dtype.kind != 'f':
+        vecs = vecs.astype(np.float64)
+    mag = np.einsum('i...,i...->...', vecs, vecs)
+    return np.sqrt(mag, out=mag)
+
+
 def _gmean(a, axis=0, clobber=False):
     """
     Compute the geometric mean along the specified axis.
 
     Modification of the scipy.mstats method to be more memory efficient
 
+    Zeros are allowed, and any zero along the axis makes the result zero.
+
     Example
         >>> rng = np.random.RandomState(0)
         >>> C, H, W = 8, 32, 32
         >>> axis = 0
         >>> a = rng.rand(2, C, H, W)
         >>> _gmean(a)
+        >>> a[0, 0, 0, 0] = 0
+        >>> assert _gmean(a)[0, 0, 0] == 0
     """
     assert isinstance(a, np.ndarray)
 
-    if clobber:
-        # NOTE: we reuse (a), we clobber the input array!
-        log_a = np.log(a, out=a)
-    else:
-        log_a = np.log(a)
+    # log(0) = -inf is what we want here, so dont warn about it
+    with np.errstate(divide='ignore'):
+        if clobber:
+            # NOTE: we reuse (a), we clobber the input array!
+            log_a = np.log(a, out=a)
+        else:
+            log_a = np.log(a)
 
     # attempt to reuse memory when computing mean
     mem = log_a[tuple([slice(None)] * axis + [0])]
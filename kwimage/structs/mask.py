@@ -301,7 +301,7 @@ class _MaskConversionMixin(object):
         data = self.data
         if self.format in {MaskFormat.C_MASK, MaskFormat.F_MASK}:
             if torch is not None and torch.is_tensor(data):
-                data = data.data.cpu().numpy()
+                data = data.detach().cpu().numpy()
         newself = self.__class__(data, self.format)
         return newself
 
@@ -3,7 +3,6 @@ import numpy as np
 import ubelt as ub
 import skimage
 import kwarray
-from distutils.version import LooseVersion  # NOQA
 import warnings
 from kwimage.structs import _generic
 
@@ -698,8 +697,9 @@ class Points(_generic.Spatial, _PointsWarpMixin):
     def from_coco(cls, coco_kpts, class_idxs=None, classes=None, warn=False):
         """
         Args:
-            coco_kpts (list | dict): either the original list keypoint encoding
-                or the new dict keypoint encoding.
+            coco_kpts (list | dict | ndarray): either the original list
+                keypoint encoding (which may also be given as an Nx3 array) or
+                the new dict keypoint encoding.
 
             class_idxs (list): only needed if using old style
 
@@ -832,7 +832,7 @@ class Points(_generic.Spatial, _PointsWarpMixin):
                        classes=classes)
         else:
             # original style
-            kp = np.array(coco_kpts).reshape(-1, 3)
+            kp = np.asarray(coco_kpts).reshape(-1, 3)
             xy = kp[:, 0:2]
             visible = kp[:, 2]
             if class_idxs is not None:
@@ -3,11 +3,11 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import ubelt as ub
 import numpy as np
 import kwarray
-from distutils.version import LooseVersion
 
 try:
     import torch
     import torch.nn.functional as F
+    from distutils.version import LooseVersion
     TORCH_GRID_SAMPLE_HAS_ALIGN = LooseVersion(torch.__version__) >= LooseVersion('1.3.0')
 except Exception:
     torch = None
@@ -214,6 +214,9 @@ def clean():
     for d in glob.glob(join(repodir, 'kwimage/structs/_mask_backend/cython_mask*.*so')):
         enqueue(d)
 
+    for d in glob.glob(join(repodir, 'kwimage/algo/_alphablend_backend/cython_alphablend*.*so')):
+        enqueue(d)
+
     enqueue(join(repodir, '_skbuild'))
     enqueue(join(repodir, '_cmake_test_compile'))
     enqueue(join(repodir, 'kwimage.egg-info'))